@@ -6,3 +6,7 @@ class ApiConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        """Подключение обработчиков сигналов."""
+        import api.signals  # noqa: F401
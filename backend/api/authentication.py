@@ -0,0 +1,159 @@
+"""Аутентификация по токену с кэшем соответствия токен → пользователь.
+
+По умолчанию записи хранятся в LRU в памяти процесса размером
+TOKEN_CACHE_SIZE и живут TOKEN_CACHE_TIMEOUT секунд. Записи удаляются
+при удалении токена (выход через djoser) и при сохранении пользователя:
+смене пароля, деактивации и любом другом изменении профиля. Сигналы
+доходят только до процесса, который изменил данные, поэтому в других
+воркерах устаревшая запись живёт не дольше TOKEN_CACHE_TIMEOUT. Если
+задан TOKEN_CACHE_ALIAS, записи хранятся в этом общем кэше Django и
+удаляются сразу во всех воркерах.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+TOKEN_KEY = 'api:token:{key}'
+
+
+class TokenCache:
+    """LRU с ограниченным временем жизни записей и счётчиками."""
+
+    def __init__(self, size, timeout, alias=None):
+        """Пустой кэш; alias — общий кэш Django вместо памяти процесса."""
+        self.size = size
+        self.timeout = timeout
+        self.alias = alias or None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        """Кэш выключен при нулевом размере или времени жизни."""
+        return self.size > 0 and self.timeout > 0
+
+    def get(self, key):
+        """Пара (user, token) по ключу токена или None."""
+        if self.alias is not None:
+            entry = caches[self.alias].get(TOKEN_KEY.format(key=key))
+        else:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry is not None:
+                    if entry[0] > time.monotonic():
+                        self.entries.move_to_end(key)
+                    else:
+                        del self.entries[key]
+                        entry = None
+            if entry is not None:
+                entry = entry[1]
+        with self.lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def set(self, key, entry):
+        """Сохранение пары (user, token) по ключу токена."""
+        if self.alias is not None:
+            caches[self.alias].set(
+                TOKEN_KEY.format(key=key), entry, self.timeout
+            )
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.timeout, entry)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        """Удаление записей по ключам токенов."""
+        if self.alias is not None:
+            caches[self.alias].delete_many(
+                [TOKEN_KEY.format(key=key) for key in keys]
+            )
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+            self.invalidations += len(keys)
+
+    def clear(self):
+        """Сброс записей и счётчиков процесса."""
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+            self.evictions = self.invalidations = 0
+
+    def stats(self):
+        """Счётчики кэша текущего процесса."""
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                'backend': self.alias or 'local',
+                'size': len(self.entries),
+                'max_size': self.size,
+                'timeout': self.timeout,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests if requests else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+token_cache = TokenCache(
+    settings.TOKEN_CACHE_SIZE,
+    settings.TOKEN_CACHE_TIMEOUT,
+    settings.TOKEN_CACHE_ALIAS,
+)
+
+
+def invalidate_tokens(*keys):
+    """Удаление токенов из кэша аутентификации."""
+    if keys:
+        token_cache.delete(*keys)
+
+
+def invalidate_user_tokens(user_id):
+    """Удаление из кэша всех токенов пользователя."""
+    invalidate_tokens(
+        *Token.objects.filter(user_id=user_id).values_list('key', flat=True)
+    )
+
+
+def copy_entry(user, token):
+    """Копии пользователя и токена для одного запроса.
+
+    Запись общая для всех потоков процесса, а представления могут
+    менять request.user, поэтому каждый запрос получает свои копии.
+    """
+    user = copy.copy(user)
+    token = copy.copy(token)
+    token.user = user
+    return user, token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication без запроса к базе для известных токенов."""
+
+    def authenticate_credentials(self, key):
+        """Пользователь и токен из кэша или из базы."""
+        if not token_cache.enabled:
+            return super().authenticate_credentials(key)
+        entry = token_cache.get(key)
+        if entry is None:
+            entry = super().authenticate_credentials(key)
+            token_cache.set(key, entry)
+        return copy_entry(*entry)
@@ -0,0 +1,164 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscriptions
+
+VERSION_KEY = 'api:version:{namespace}'
+RESPONSE_KEY = 'api:response:{namespace}:{version}:{digest}'
+USER_NAMESPACE = 'user:{user_id}'
+
+
+def get_cache():
+    """Кэш, общий для всех воркеров (см. settings.CACHES)."""
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def get_version(namespace):
+    """Текущая версия пространства имён кэша.
+
+    Версия — это отметка времени последнего изменения в миллисекундах,
+    поэтому её можно использовать и как Last-Modified.
+    """
+    cache = get_cache()
+    key = VERSION_KEY.format(namespace=namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_versions(namespaces):
+    """Увеличение версий пространств имён в кэше."""
+    cache = get_cache()
+    now = int(time.time() * 1000)
+    for namespace in namespaces:
+        key = VERSION_KEY.format(namespace=namespace)
+        cache.set(key, max(now, (cache.get(key) or 0) + 1), None)
+
+
+def bump_version(*namespaces):
+    """Инвалидация пространств имён увеличением их версий.
+
+    Внутри транзакции версии увеличиваются после её фиксации: иначе
+    параллельный запрос может увидеть новую версию, прочитать данные до
+    фиксации и сохранить их в кэше под новым ключом и ETag. Вне
+    транзакции версии увеличиваются сразу.
+    """
+    transaction.on_commit(lambda: _bump_versions(namespaces))
+
+
+def get_user_version(user_id):
+    """Версия связей пользователя: избранное, корзина и подписки."""
+    return get_version(USER_NAMESPACE.format(user_id=user_id))
+
+
+def bump_user_version(*user_ids):
+    """Инвалидация данных, зависящих от связей пользователей."""
+    bump_version(
+        *(USER_NAMESPACE.format(user_id=user_id) for user_id in user_ids)
+    )
+
+
+def normalize_query(request):
+    """Параметры запроса, отсортированные по имени и значению."""
+    return sorted(
+        (name, sorted(values))
+        for name, values in request.query_params.lists()
+    )
+
+
+def make_validators(request, stamps, *parts):
+    """ETag и Last-Modified по отметкам версий и частям ключа.
+
+    stamps — отметки времени изменения в миллисекундах, parts —
+    дополнительные значения, от которых зависит тело ответа. В ETag
+    также входят строка запроса, пользователь и формат ответа.
+    """
+    raw = repr((
+        stamps,
+        parts,
+        normalize_query(request),
+        request.user.pk,
+        getattr(request.accepted_renderer, 'format', None),
+    ))
+    etag = '"{}"'.format(hashlib.md5(raw.encode()).hexdigest())
+    return etag, max(stamps) // 1000
+
+
+def get_response_key(request, namespace):
+    """Ключ ответа по нормализованной строке запроса.
+
+    Параметры сортируются по имени и значению, поэтому ?a=1&b=2 и
+    ?b=2&a=1 попадают в одну запись. В ключ входят схема и хост, так как
+    ссылки на изображения и пагинацию абсолютные.
+    """
+    raw = '{}|{}|{}'.format(
+        request.build_absolute_uri(request.path),
+        normalize_query(request),
+        request.accepted_renderer.format,
+    )
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return RESPONSE_KEY.format(
+        namespace=namespace,
+        version=get_version(namespace),
+        digest=digest,
+    )
+
+
+def iter_recipes(data):
+    """Представления рецептов внутри данных ответа."""
+    if isinstance(data, dict):
+        data = data.get('results', [data])
+    return [item for item in data if isinstance(item, dict)]
+
+
+def strip_recipe_flags(data):
+    """Сброс пользовательских флагов рецептов для общего кэша."""
+    for recipe in iter_recipes(data):
+        recipe['is_favorited'] = False
+        recipe['is_in_shopping_cart'] = False
+        if recipe.get('author'):
+            recipe['author']['is_subscribed'] = False
+    return data
+
+
+def overlay_recipe_flags(data, user):
+    """Наложение флагов текущего пользователя на общие данные.
+
+    Флаги загружаются тремя запросами только для рецептов и авторов,
+    которые присутствуют в ответе.
+    """
+    recipes = iter_recipes(data)
+    recipe_ids = [recipe['id'] for recipe in recipes]
+    author_ids = {
+        recipe['author']['id'] for recipe in recipes if recipe.get('author')
+    }
+    favorited = set(
+        Favorite.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True)
+    )
+    in_cart = set(
+        ShoppingCart.objects.filter(
+            user=user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True)
+    )
+    subscribed = set(
+        Subscriptions.objects.filter(
+            user=user, author_id__in=author_ids
+        ).values_list('author_id', flat=True)
+    )
+    for recipe in recipes:
+        recipe['is_favorited'] = recipe['id'] in favorited
+        recipe['is_in_shopping_cart'] = recipe['id'] in in_cart
+        if recipe.get('author'):
+            recipe['author']['is_subscribed'] = (
+                recipe['author']['id'] in subscribed
+            )
+    return data
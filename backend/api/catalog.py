@@ -0,0 +1,63 @@
+import gzip
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from api.cache import get_version
+from api.constants import CATALOG_GZIP_LEVEL
+
+
+@dataclass(frozen=True)
+class CatalogBlob:
+    """Закодированный справочник и его сжатая версия."""
+
+    version: int
+    etag: str
+    body: bytes
+    gzipped: bytes
+    built_at: float
+
+
+_blobs = {}
+_lock = threading.Lock()
+
+
+def is_fresh(blob, version):
+    """Блоб собран для версии version и не старше CATALOG_BLOB_TTL."""
+    return (
+        blob is not None
+        and blob.version == version
+        and time.monotonic() - blob.built_at < settings.CATALOG_BLOB_TTL
+    )
+
+
+def get_catalog_blob(namespace, build):
+    """Актуальный блоб справочника пространства имён namespace.
+
+    Блоб хранится в памяти процесса и пересобирается функцией build,
+    возвращающей JSON в байтах, при смене версии пространства имён или
+    по истечении CATALOG_BLOB_TTL секунд. Срок нужен, если процесс не
+    видит версию, изменённую в другом процессе (например, командой
+    load_ingredients при кэше locmem).
+    """
+    version = get_version(namespace)
+    blob = _blobs.get(namespace)
+    if is_fresh(blob, version):
+        return blob
+    with _lock:
+        blob = _blobs.get(namespace)
+        if not is_fresh(blob, version):
+            body = build()
+            digest = hashlib.sha256(body).hexdigest()[:32]
+            blob = CatalogBlob(
+                version=version,
+                etag=f'"{digest}"',
+                body=body,
+                gzipped=gzip.compress(body, CATALOG_GZIP_LEVEL, mtime=0),
+                built_at=time.monotonic(),
+            )
+            _blobs[namespace] = blob
+    return blob
@@ -23,3 +23,37 @@ MEASUREMENT_UNIT_LENGTH = 20
 VALIDATOR_MIN_VALUE = 1
 VALIDATOR_MAX_VALUE = 32000
 DEFAULT_VALUE = 0
+
+PAGE_SIZE = 6
+PAGINATION_QUERY_PARAM = 'pagination'
+PAGINATION_CURSOR = 'cursor'
+CURSOR_QUERY_PARAM = 'cursor'
+COUNT_QUERY_PARAM = 'count'
+COUNT_ESTIMATE = 'estimate'
+
+STREAMING_CHUNK_SIZE = 2000
+
+BATCH_MAX_SIZE = 100
+BATCH_QUERY_PARAM = 'ids'
+
+ASYNC_QUERY_PARAM = 'async'
+ASYNC_TRUE_VALUES = ('1', 'true', 'yes')
+JOB_RETRY_AFTER = 1
+
+CATALOG_GZIP_LEVEL = 9
+
+# Варианты изображений: имя → (ширина, высота).
+IMAGE_VARIANTS = {
+    'thumb': (100, 100),
+    'card': (480, 320),
+}
+IMAGE_VARIANT_FORMATS = ('webp', 'jpeg')
+IMAGE_VARIANT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+IMAGE_VARIANT_QUALITY = 82
+IMAGE_VARIANT_DIR = 'variants'
+IMAGE_VARIANT_BACKGROUND = (255, 255, 255)
+IMAGE_VARIANT_CACHE_SIZE = 10000
+
+# Размер части base64 при потоковом декодировании, кратен 4.
+BASE64_CHUNK_SIZE = 64 * 1024
+MULTIPART_DATA_FIELD = 'data'
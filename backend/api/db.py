@@ -0,0 +1,37 @@
+from django.db import connections, router
+
+
+def delete_rows(model, returning=None, **conditions):
+    """Удаление строк модели одним DELETE без сигналов.
+
+    Условия задаются полями модели: значение сравнивается на равенство,
+    список — через IN. Возвращает число удалённых строк, а с
+    returning=<поле> — список значений этого поля у удалённых строк
+    (DELETE ... RETURNING, только PostgreSQL).
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    clauses = []
+    params = []
+    for name, value in conditions.items():
+        column = quote(model._meta.get_field(name).column)
+        if isinstance(value, (list, tuple, set, frozenset)):
+            if not value:
+                return [] if returning else 0
+            clauses.append(
+                '{} IN ({})'.format(column, ', '.join(['%s'] * len(value)))
+            )
+            params.extend(value)
+        else:
+            clauses.append(f'{column} = %s')
+            params.append(value)
+    sql = 'DELETE FROM {} WHERE {}'.format(
+        quote(model._meta.db_table), ' AND '.join(clauses)
+    )
+    if returning:
+        sql += ' RETURNING ' + quote(model._meta.get_field(returning).column)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        if returning:
+            return [row[0] for row in cursor.fetchall()]
+        return cursor.rowcount
@@ -0,0 +1,99 @@
+"""Лента рецептов авторов, на которых подписан пользователь.
+
+Новые рецепты рассылаются в ленты подписчиков (fan-out on write)
+пакетами по FEED_FAN_OUT_BATCH записей. Автор, у которого подписчиков
+больше FEED_FAN_OUT_LIMIT, помечается feed_on_read: его рецепты в ленты
+не копируются, а добавляются при чтении ленты. Пометка не снимается,
+чтобы в лентах не появлялось пропусков.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscriptions
+
+User = get_user_model()
+
+
+def insert_entries(entries):
+    """Вставка записей ленты пакетами без повторов."""
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, settings.FEED_FAN_OUT_BATCH))
+        if not batch:
+            return
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_recipe(recipe_id):
+    """Рассылка нового рецепта в ленты подписчиков автора."""
+    recipe = Recipe.objects.filter(pk=recipe_id).values(
+        'author_id', 'pub_date', 'author__feed_on_read'
+    ).first()
+    if recipe is None or recipe['author__feed_on_read']:
+        return
+    author_id = recipe['author_id']
+    followers = Subscriptions.objects.filter(author_id=author_id)
+    if followers.count() > settings.FEED_FAN_OUT_LIMIT:
+        User.objects.filter(pk=author_id).update(feed_on_read=True)
+        return
+    insert_entries(
+        FeedEntry(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            pub_date=recipe['pub_date'],
+        )
+        for user_id in followers.values_list('user_id', flat=True).iterator(
+            chunk_size=settings.FEED_FAN_OUT_BATCH
+        )
+    )
+
+
+def follow(user_id, author_ids):
+    """Добавление в ленту рецептов новых авторов из подписок."""
+    recipes = Recipe.objects.filter(
+        author_id__in=author_ids, author__feed_on_read=False
+    ).values_list('id', 'author_id', 'pub_date')
+    insert_entries(
+        FeedEntry(
+            user_id=user_id,
+            recipe_id=recipe_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for recipe_id, author_id, pub_date in recipes.iterator(
+            chunk_size=settings.FEED_FAN_OUT_BATCH
+        )
+    )
+
+
+def unfollow(user_id, author_ids):
+    """Удаление из ленты рецептов авторов, от которых отписались."""
+    FeedEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).delete()
+
+
+def get_feed_streams(user, recipes=None):
+    """Источники ленты для FeedPagination.
+
+    Записи ленты читаются по индексу (user, -pub_date, -recipe), рецепты
+    авторов feed_on_read — по индексу (author, -pub_date, -id). Если
+    передан recipes, источники ограничиваются его рецептами.
+    """
+    entries = FeedEntry.objects.filter(user=user)
+    on_read = Recipe.objects.filter(
+        author_id__in=Subscriptions.objects.filter(
+            user=user, author__feed_on_read=True
+        ).values('author_id')
+    )
+    if recipes is not None:
+        entries = entries.filter(recipe__in=recipes.values('pk'))
+        on_read = on_read.filter(pk__in=recipes.values('pk'))
+    return [
+        (entries, ('-pub_date', '-recipe_id')),
+        (on_read, ('-pub_date', '-id')),
+    ]
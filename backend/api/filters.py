@@ -1,5 +1,8 @@
+from django.db.models import Case, IntegerField, Value, When
 from django_filters import rest_framework
 
+from api.search import get_search_limit
+
 from recipes.models import Ingredient, Recipe, Tag
 
 
@@ -44,11 +47,25 @@ class IngredientFilter(rest_framework.FilterSet):
     """Фильтр для ингредиентов."""
 
     name = rest_framework.CharFilter(
-        field_name='name',
-        lookup_expr='icontains',
+        method='filter_name',
         label='Поиск по названию ингредиента',
     )
 
     class Meta:
         model = Ingredient
         fields = ['name']
+
+    def filter_name(self, queryset, name, value):
+        """Поиск по вхождению: сначала совпадения по префиксу.
+
+        На PostgreSQL оба условия обслуживаются триграммным индексом.
+        """
+        queryset = queryset.filter(name__icontains=value).annotate(
+            prefix_rank=Case(
+                When(name__istartswith=value, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        ).order_by('prefix_rank', 'name')
+        limit = get_search_limit()
+        return queryset[:limit] if limit else queryset
@@ -0,0 +1,184 @@
+"""Уменьшенные варианты аватаров и изображений рецептов.
+
+Варианты создаются один раз при загрузке файла (см. api.signals) и
+лежат рядом с оригиналом в каталоге variants под детерминированными
+именами. Каждый вариант сохраняется в WebP (если его поддерживает
+Pillow) и в JPEG для клиентов без поддержки WebP; метаданные (EXIF,
+ICC) не копируются. В ответах API отдаются только варианты, файлы
+которых уже есть в хранилище, а вместо несозданного — оригинал.
+"""
+import posixpath
+from functools import lru_cache
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+from api.constants import (
+    IMAGE_VARIANT_BACKGROUND,
+    IMAGE_VARIANT_CACHE_SIZE,
+    IMAGE_VARIANT_DIR,
+    IMAGE_VARIANT_EXTENSIONS,
+    IMAGE_VARIANT_FORMATS,
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANTS,
+)
+
+_existing_variants = set()
+
+
+@lru_cache(maxsize=None)
+def get_variant_formats():
+    """Форматы вариантов, которые поддерживает установленный Pillow."""
+    return tuple(
+        image_format for image_format in IMAGE_VARIANT_FORMATS
+        if image_format != 'webp' or features.check('webp')
+    )
+
+
+def get_variant_name(name, variant, image_format):
+    """Имя файла варианта по имени оригинала."""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(
+        directory,
+        IMAGE_VARIANT_DIR,
+        f'{stem}.{variant}.{IMAGE_VARIANT_EXTENSIONS[image_format]}',
+    )
+
+
+def get_variant_names(name):
+    """Имена всех вариантов оригинала."""
+    return [
+        get_variant_name(name, variant, image_format)
+        for variant in IMAGE_VARIANTS
+        for image_format in get_variant_formats()
+    ]
+
+
+def variant_exists(storage, name):
+    """Есть ли файл варианта в хранилище.
+
+    Найденные имена запоминаются в памяти процесса: имя варианта
+    производно от имени оригинала, а созданный вариант не удаляется,
+    пока на оригинал есть ссылки (см. sweep_media). Отсутствие не
+    запоминается, чтобы вариант появился в ответах сразу после создания.
+    """
+    if name in _existing_variants:
+        return True
+    if not storage.exists(name):
+        return False
+    if len(_existing_variants) >= IMAGE_VARIANT_CACHE_SIZE:
+        _existing_variants.clear()
+    _existing_variants.add(name)
+    return True
+
+
+def get_original_format(name):
+    """Формат оригинала по расширению имени файла."""
+    extension = posixpath.splitext(name)[1].lower().lstrip('.')
+    formats = {
+        variant_extension: image_format
+        for image_format, variant_extension
+        in IMAGE_VARIANT_EXTENSIONS.items()
+    }
+    return formats.get(extension, extension)
+
+
+def get_variant_urls(file, build_url=None):
+    """URL вариантов файла: {вариант: {формат: URL}} или None.
+
+    Указываются только созданные форматы варианта; если не создан ни
+    один, вариант ссылается на оригинал в его формате.
+    """
+    if not file:
+        return None
+    storage = file.storage
+    urls = {}
+    for variant in IMAGE_VARIANTS:
+        names = {
+            image_format: get_variant_name(file.name, variant, image_format)
+            for image_format in IMAGE_VARIANT_FORMATS
+        }
+        names = {
+            image_format: name for image_format, name in names.items()
+            if variant_exists(storage, name)
+        } or {get_original_format(file.name): file.name}
+        urls[variant] = {}
+        for image_format, name in names.items():
+            url = storage.url(name)
+            urls[variant][image_format] = (
+                build_url(url) if build_url is not None else url
+            )
+    return urls
+
+
+def flatten(image):
+    """Изображение без прозрачности на белом фоне."""
+    if image.mode in ('RGBA', 'LA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    ):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, IMAGE_VARIANT_BACKGROUND)
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render_variant(image, size, image_format):
+    """Вариант изображения заданного размера в байтах."""
+    variant = ImageOps.fit(image, size, Image.LANCZOS)
+    if image_format == 'jpeg':
+        variant = flatten(variant)
+    variant.info = {}
+    buffer = BytesIO()
+    variant.save(
+        buffer,
+        format=image_format.upper(),
+        quality=IMAGE_VARIANT_QUALITY,
+        optimize=image_format == 'jpeg',
+    )
+    return buffer.getvalue()
+
+
+def save_variant(storage, name, content):
+    """Запись варианта под его детерминированным именем.
+
+    ContentAddressedStorage подменяет файл атомарно (save_derived), для
+    остальных хранилищ прежний вариант удаляется перед записью.
+    """
+    if hasattr(storage, 'save_derived'):
+        return storage.save_derived(name, content)
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, content)
+
+
+def make_variants(file):
+    """Создание всех вариантов файла; возвращает их имена.
+
+    Существующие варианты перезаписываются, чтобы имена оставались
+    детерминированными.
+    """
+    if not file:
+        return []
+    storage = file.storage
+    with storage.open(file.name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = (
+            image.convert('RGBA')
+            if 'A' in image.getbands() or 'transparency' in image.info
+            else image.convert('RGB')
+        )
+    names = []
+    for variant, size in IMAGE_VARIANTS.items():
+        for image_format in get_variant_formats():
+            names.append(save_variant(
+                storage,
+                get_variant_name(file.name, variant, image_format),
+                ContentFile(render_variant(image, size, image_format)),
+            ))
+    return names
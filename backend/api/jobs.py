@@ -0,0 +1,161 @@
+"""Фоновая отрисовка PDF списка покупок в локальном пуле процессов.
+
+Идентификатор задачи вычисляется из ключа PDF в кэше (пользователь,
+версия корзины и справочника ингредиентов), поэтому повторные запросы
+к неизменённой корзине не ставят новую задачу. Состояние задач и готовые
+файлы хранятся в кэше Django, внешний брокер не нужен. При нескольких
+воркерах gunicorn кэш должен быть общим (CACHE_BACKEND=file или db,
+по умолчанию file).
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+import django
+from django.conf import settings
+from django.db import close_old_connections
+
+from api.cache import get_cache
+from api.shopping import (
+    get_pdf_key,
+    get_shopping_list,
+    load_pdf_backend,
+    render_pdf_bytes,
+    store_pdf,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY = 'api:shopping-job:{job_id}'
+
+JOB_PENDING = 'pending'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Пул процессов отрисовки, создаётся при первом обращении.
+
+    Пул создаётся лениво, поэтому каждый воркер gunicorn, в том числе
+    после preload, получает собственный пул.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.SHOPPING_LIST_WORKERS,
+                initializer=init_worker,
+            )
+        return _executor
+
+
+def init_worker():
+    """Подготовка процесса пула: Django и ReportLab со шрифтом."""
+    django.setup()
+    load_pdf_backend()
+
+
+def reset_executor():
+    """Сброс пула, например после аварийного завершения процесса."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+        _executor = None
+
+
+def get_job_id(pdf_key):
+    """Идентификатор задачи по ключу PDF в кэше."""
+    return hashlib.sha256(pdf_key.encode()).hexdigest()[:32]
+
+
+def get_job(job_id):
+    """Состояние задачи из кэша или None."""
+    return get_cache().get(JOB_KEY.format(job_id=job_id))
+
+
+def set_job(job_id, job):
+    """Сохранение состояния задачи в кэш."""
+    get_cache().set(
+        JOB_KEY.format(job_id=job_id), job,
+        settings.SHOPPING_LIST_JOB_TIMEOUT,
+    )
+
+
+def get_job_pdf(job):
+    """Пара (etag, pdf) готовой задачи или None."""
+    if job['status'] != JOB_DONE:
+        return None
+    return get_cache().get(job['pdf_key'])
+
+
+def submit(ingredients):
+    """Отправка строк списка покупок в пул процессов."""
+    try:
+        return get_executor().submit(render_pdf_bytes, ingredients)
+    except BrokenProcessPool:
+        reset_executor()
+        return get_executor().submit(render_pdf_bytes, ingredients)
+
+
+def start_pdf_job(user):
+    """Постановка задачи отрисовки PDF для корзины пользователя.
+
+    Возвращает пару (job_id, job) или None, если корзина пуста. Если
+    PDF текущей версии корзины уже в кэше или задача для неё уже
+    выполняется, новая задача не ставится.
+    """
+    pdf_key = get_pdf_key(user)
+    job_id = get_job_id(pdf_key)
+    job = {'user_id': user.pk, 'pdf_key': pdf_key, 'status': JOB_PENDING}
+    cache = get_cache()
+    if cache.get(pdf_key) is not None:
+        job['status'] = JOB_DONE
+        set_job(job_id, job)
+        return job_id, job
+
+    current = get_job(job_id)
+    if current is not None and current['status'] != JOB_FAILED:
+        return job_id, current
+    ingredients = list(get_shopping_list(user))
+    if not ingredients:
+        return None
+    if current is not None:
+        cache.delete(JOB_KEY.format(job_id=job_id))
+    if not cache.add(
+        JOB_KEY.format(job_id=job_id), job,
+        settings.SHOPPING_LIST_JOB_TIMEOUT,
+    ):
+        return job_id, get_job(job_id) or job
+
+    try:
+        future = submit(ingredients)
+    except Exception:
+        logger.exception('Не удалось поставить задачу %s', job_id)
+        job = {**job, 'status': JOB_FAILED}
+        set_job(job_id, job)
+        return job_id, job
+    future.add_done_callback(partial(finish_pdf_job, job_id, job))
+    return job_id, job
+
+
+def finish_pdf_job(job_id, job, future):
+    """Сохранение результата задачи; вызывается в процессе воркера."""
+    try:
+        pdf = future.result()
+    except Exception:
+        logger.exception('Ошибка отрисовки списка покупок %s', job_id)
+        job = {**job, 'status': JOB_FAILED}
+    else:
+        store_pdf(job['pdf_key'], pdf)
+        job = {**job, 'status': JOB_DONE}
+    try:
+        set_job(job_id, job)
+    finally:
+        close_old_connections()
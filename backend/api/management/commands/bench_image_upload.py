@@ -0,0 +1,114 @@
+import base64
+import io
+import os
+import tracemalloc
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework.request import Request
+
+from api.parsers import MultiPartJSONParser
+from api.serializers import ImageUploadField
+
+MEGABYTE = 1024 * 1024
+
+
+def make_png(size):
+    """PNG из случайного шума примерно заданного размера."""
+    side = int((size / 3) ** 0.5)
+    image = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=0)
+    return buffer.getvalue()
+
+
+def measure(function):
+    """Пиковый объём памяти Python при вызове function, в байтах."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    close = getattr(result, 'close', None)
+    if close is not None:
+        close()
+    return peak
+
+
+class Command(BaseCommand):
+    """Замер пиковой памяти при загрузке изображения."""
+
+    help = (
+        'Сравнивает пиковую память Python (tracemalloc) при разборе '
+        'изображения прежним способом (base64.b64decode целиком и '
+        'Base64ImageField) и новым (потоковое декодирование base64 и '
+        'multipart). Исходная строка или тело запроса в замер не входят.'
+    )
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--size', type=float, default=4,
+            help='Размер изображения в мегабайтах.',
+        )
+
+    def handle(self, *args, **options):
+        """Запуск замеров."""
+        png = make_png(int(options['size'] * MEGABYTE))
+        data_url = 'data:image/png;base64,' + base64.b64encode(png).decode()
+        boundary = uuid.uuid4().hex
+        factory = RequestFactory()
+        body = b''.join([
+            f'--{boundary}\r\n'.encode(),
+            b'Content-Disposition: form-data; name="avatar"; '
+            b'filename="avatar.png"\r\n',
+            b'Content-Type: image/png\r\n\r\n',
+            png,
+            f'\r\n--{boundary}--\r\n'.encode(),
+        ])
+
+        def legacy_view():
+            header, encoded = data_url.split(';base64,')
+            return ContentFile(base64.b64decode(encoded), name='avatar.png')
+
+        def legacy_field():
+            return Base64ImageField().to_internal_value(data_url)
+
+        def streaming_field():
+            return ImageUploadField().to_internal_value(data_url)
+
+        request = Request(
+            factory.generic(
+                'POST', '/', body,
+                content_type=f'multipart/form-data; boundary={boundary}',
+            ),
+            parsers=[MultiPartJSONParser()],
+        )
+        del body
+
+        def multipart():
+            return ImageUploadField().to_internal_value(
+                request.data['avatar']
+            )
+
+        self.stdout.write(
+            f'Изображение: {len(png) / MEGABYTE:.2f} МБ, '
+            f'base64: {len(data_url) / MEGABYTE:.2f} МБ'
+        )
+        for title, function in (
+            ('base64, b64decode целиком (view)', legacy_view),
+            ('base64, Base64ImageField', legacy_field),
+            ('base64, потоковое декодирование', streaming_field),
+            ('multipart', multipart),
+        ):
+            peak = measure(function)
+            self.stdout.write(
+                f'{title:<36} {peak / MEGABYTE:8.2f} МБ '
+                f'({peak / len(png):.2f} x файл)'
+            )
@@ -0,0 +1,77 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.filters import IngredientFilter
+from api.search import IngredientIndex
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    """Сравнение поиска ингредиентов: индекс в памяти и фильтр БД."""
+
+    help = (
+        'Замеряет время поиска ингредиентов по индексу в памяти, '
+        'по фильтру IngredientFilter и по исходному icontains.'
+    )
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=None)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        """Запуск замеров."""
+        names = list(Ingredient.objects.values_list('name', flat=True))
+        if not names:
+            self.stderr.write('Справочник ингредиентов пуст.')
+            return
+        rng = random.Random(options['seed'])
+        queries = []
+        for _ in range(options['queries']):
+            name = rng.choice(names).lower()
+            start = rng.randrange(len(name))
+            queries.append(name[start:start + rng.randint(1, 5)])
+        limit = options['limit']
+
+        started = time.perf_counter()
+        index = IngredientIndex(
+            Ingredient.objects.values_list('id', 'name', 'measurement_unit')
+        )
+        self.stdout.write(
+            f'Построение индекса: {len(index.rows)} строк за '
+            f'{(time.perf_counter() - started) * 1000:.1f} мс'
+        )
+
+        def run_index(query):
+            return index.search(query, limit)
+
+        def run_filter(query):
+            return list(IngredientFilter().filter_name(
+                Ingredient.objects.all(), 'name', query
+            ).values('id', 'name', 'measurement_unit'))
+
+        def run_icontains(query):
+            queryset = Ingredient.objects.filter(name__icontains=query)
+            if limit:
+                queryset = queryset[:limit]
+            return list(queryset.values('id', 'name', 'measurement_unit'))
+
+        for label, func in (
+            ('Индекс в памяти', run_index),
+            ('IngredientFilter (БД)', run_filter),
+            ('icontains (исходный)', run_icontains),
+        ):
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                func(query)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f'{label}: среднее {statistics.mean(timings):.3f} мс, '
+                f'p95 {timings[int(len(timings) * 0.95) - 1]:.3f} мс'
+            )
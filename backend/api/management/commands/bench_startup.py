@@ -0,0 +1,84 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROBE = '''
+import json
+import resource
+import sys
+import time
+
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from importlib import import_module
+import_module({urlconf!r})
+urls_done = time.perf_counter()
+print(json.dumps({{
+    'setup': (setup_done - started) * 1000,
+    'urls': (urls_done - setup_done) * 1000,
+    'total': (urls_done - started) * 1000,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'modules': len(sys.modules),
+    'reportlab': 'reportlab' in sys.modules,
+}}))
+'''
+
+
+class Command(BaseCommand):
+    """Замер времени запуска приложения и потребления памяти."""
+
+    help = (
+        'Запускает django.setup() и импорт URLconf в отдельных процессах '
+        'и выводит время, пиковый RSS и число загруженных модулей.'
+    )
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--runs', type=int, default=10)
+        parser.add_argument(
+            '--json', action='store_true',
+            help='Вывести результаты в формате JSON.',
+        )
+
+    def handle(self, *args, **options):
+        """Запуск замеров."""
+        probe = PROBE.format(urlconf=settings.ROOT_URLCONF)
+        env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+        env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+        runs = []
+        for _ in range(options['runs']):
+            result = subprocess.run(
+                [sys.executable, '-c', probe],
+                capture_output=True, text=True, env=env,
+                cwd=settings.BASE_DIR,
+            )
+            if result.returncode:
+                raise CommandError(result.stderr)
+            runs.append(json.loads(result.stdout.splitlines()[-1]))
+
+        summary = {
+            key: statistics.median(run[key] for run in runs)
+            for key in ('setup', 'urls', 'total', 'rss', 'modules')
+        }
+        summary['reportlab'] = any(run['reportlab'] for run in runs)
+        if options['json']:
+            self.stdout.write(json.dumps(summary))
+            return
+        self.stdout.write(
+            f'Медиана по {len(runs)} запускам: '
+            f'django.setup() {summary["setup"]:.1f} мс, '
+            f'URLconf {summary["urls"]:.1f} мс, '
+            f'всего {summary["total"]:.1f} мс'
+        )
+        self.stdout.write(
+            f'Пиковый RSS {summary["rss"]:.1f} МБ, '
+            f'модулей {summary["modules"]:.0f}, '
+            f'ReportLab загружен: {"да" if summary["reportlab"] else "нет"}'
+        )
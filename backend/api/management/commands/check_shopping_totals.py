@@ -0,0 +1,81 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.shopping import calculate_totals, rebuild_shopping_totals
+from recipes.models import ShoppingCart, ShoppingTotal
+
+
+def batched(values, size):
+    """Разбиение списка на части не длиннее size."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class Command(BaseCommand):
+    """Сверка таблицы итогов списков покупок с корзинами."""
+
+    help = (
+        'Сравнивает ShoppingTotal с суммами по рецептам корзин и '
+        'с --rebuild пересчитывает итоги расходящихся пользователей.'
+    )
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать итоги пользователей с расхождениями.',
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать итоги всех пользователей без сверки.',
+        )
+        parser.add_argument('--user', type=int, nargs='*', default=None)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        """Сверка и пересчёт."""
+        user_ids = options['user']
+        if user_ids is None:
+            user_ids = sorted(
+                set(ShoppingCart.objects.values_list('user_id', flat=True))
+                | set(ShoppingTotal.objects.values_list('user_id', flat=True))
+            )
+        if options['all']:
+            for batch in batched(user_ids, options['batch_size']):
+                rebuild_shopping_totals(batch)
+            self.stdout.write(f'Пересчитано пользователей: {len(user_ids)}')
+            return
+
+        broken = []
+        for batch in batched(user_ids, options['batch_size']):
+            expected = defaultdict(dict)
+            for row in calculate_totals(batch):
+                expected[row['recipe__cart__user_id']][
+                    row['ingredient_id']
+                ] = row['total']
+            actual = defaultdict(dict)
+            for user_id, ingredient_id, total in (
+                ShoppingTotal.objects.filter(user_id__in=batch)
+                .values_list('user_id', 'ingredient_id', 'total')
+            ):
+                actual[user_id][ingredient_id] = total
+            broken.extend(
+                user_id for user_id in batch
+                if expected.get(user_id, {}) != actual.get(user_id, {})
+            )
+
+        self.stdout.write(
+            f'Проверено пользователей: {len(user_ids)}, '
+            f'с расхождениями: {len(broken)}'
+        )
+        if not broken:
+            return
+        if not options['rebuild']:
+            raise CommandError(
+                'Итоги расходятся у пользователей: '
+                + ', '.join(map(str, broken))
+            )
+        for batch in batched(broken, options['batch_size']):
+            rebuild_shopping_totals(batch)
+        self.stdout.write(f'Пересчитано пользователей: {len(broken)}')
@@ -0,0 +1,78 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import bump_version
+from api.images import get_variant_names, make_variants
+from api.signals import CACHE_DEPENDENCIES
+from recipes.models import Recipe
+
+User = get_user_model()
+
+# Источник: модель и поле изображения.
+SOURCES = {
+    'recipes': (Recipe, 'image'),
+    'avatars': (User, 'avatar'),
+}
+
+
+class Command(BaseCommand):
+    """Создание вариантов для уже загруженных изображений."""
+
+    help = (
+        'Создаёт уменьшенные варианты изображений рецептов и аватаров, '
+        'загруженных до появления вариантов. По умолчанию пропускает '
+        'файлы, у которых все варианты уже есть.'
+    )
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            'sources', nargs='*',
+            help='recipes и/или avatars, по умолчанию оба.',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать варианты, даже если они уже есть.',
+        )
+
+    def handle(self, *args, **options):
+        """Обход файлов и создание недостающих вариантов."""
+        sources = options['sources'] or list(SOURCES)
+        unknown = set(sources) - set(SOURCES)
+        if unknown:
+            raise CommandError(
+                'Неизвестные источники: ' + ', '.join(sorted(unknown))
+            )
+        for source in sources:
+            model, field = SOURCES[source]
+            names = (
+                model.objects.exclude(**{field: ''})
+                .exclude(**{f'{field}__isnull': True})
+                .values_list(field, flat=True)
+                .distinct()
+            )
+            created = skipped = failed = 0
+            for name in names.iterator():
+                file = getattr(model(**{field: name}), field)
+                storage = file.storage
+                if not options['force'] and all(
+                    storage.exists(variant)
+                    for variant in get_variant_names(name)
+                ):
+                    skipped += 1
+                    continue
+                try:
+                    make_variants(file)
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                else:
+                    created += 1
+            if created:
+                # Кэшированные ответы ссылаются на оригинал вместо
+                # вариантов, которых ещё не было.
+                bump_version(*CACHE_DEPENDENCIES[model])
+            self.stdout.write(
+                f'{source}: создано {created}, пропущено {skipped}, '
+                f'с ошибками {failed}'
+            )
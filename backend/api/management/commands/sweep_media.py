@@ -0,0 +1,118 @@
+import posixpath
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+
+from api.constants import IMAGE_VARIANT_FORMATS, IMAGE_VARIANTS
+from api.images import get_variant_name
+
+MEGABYTE = 1024 * 1024
+
+
+def get_file_fields():
+    """Файловые поля моделей, хранящиеся в default_storage."""
+    return [
+        (model, field)
+        for model in apps.get_models()
+        for field in model._meta.get_fields()
+        if isinstance(field, models.FileField)
+        and field.storage is default_storage
+        and isinstance(field.upload_to, str)
+    ]
+
+
+def count_references(file_fields):
+    """Число записей, ссылающихся на каждый файл."""
+    references = Counter()
+    for model, field in file_fields:
+        rows = (
+            model._default_manager.exclude(**{field.attname: ''})
+            .exclude(**{f'{field.attname}__isnull': True})
+            .values(field.attname)
+            .annotate(references=models.Count('pk'))
+            .order_by()
+        )
+        for row in rows.iterator():
+            references[row[field.attname]] += row['references']
+    return references
+
+
+def iter_files(storage, directory):
+    """Все файлы каталога хранилища с подкаталогами."""
+    if not storage.exists(directory):
+        return
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from iter_files(storage, posixpath.join(directory, name))
+
+
+class Command(BaseCommand):
+    """Удаление медиафайлов, на которые не ссылается ни одна запись."""
+
+    help = (
+        'Считает ссылки на файлы из всех FileField/ImageField и удаляет '
+        'из их каталогов файлы без ссылок вместе с вариантами. Файлы '
+        'моложе --min-age секунд не удаляются: запись, ссылающаяся на '
+        'только что загруженный файл, может быть ещё не сохранена.'
+    )
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=settings.MEDIA_SWEEP_MIN_AGE,
+        )
+
+    def handle(self, *args, **options):
+        """Подсчёт ссылок и удаление файлов без ссылок."""
+        storage = default_storage
+        file_fields = get_file_fields()
+        references = count_references(file_fields)
+        keep = set(references)
+        for name in references:
+            keep.update(
+                get_variant_name(name, variant, image_format)
+                for variant in IMAGE_VARIANTS
+                for image_format in IMAGE_VARIANT_FORMATS
+            )
+        directories = sorted({
+            posixpath.normpath(field.upload_to)
+            for _, field in file_fields
+        })
+        deadline = time.time() - options['min_age']
+        scanned = removed = young = freed = 0
+        for directory in directories:
+            for name in iter_files(storage, directory):
+                scanned += 1
+                if name in keep:
+                    continue
+                if storage.get_modified_time(name).timestamp() > deadline:
+                    young += 1
+                    continue
+                removed += 1
+                freed += storage.size(name)
+                if options['dry_run']:
+                    self.stdout.write(name)
+                else:
+                    storage.delete(name)
+
+        shared = [count for count in references.values() if count > 1]
+        self.stdout.write(
+            f'Файлов: {scanned}, используется: {len(references)}, '
+            f'общих: {len(shared)} (ссылок на них: {sum(shared)})'
+        )
+        action = 'К удалению' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            f'{action}: {removed} ({freed / MEGABYTE:.2f} МБ), '
+            f'пропущено новых: {young}'
+        )
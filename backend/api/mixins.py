@@ -0,0 +1,488 @@
+import copy
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from api.catalog import get_catalog_blob
+from api.search import get_ingredient_index, get_search_limit
+from api.cache import (
+    bump_user_version,
+    get_cache,
+    get_response_key,
+    get_user_version,
+    get_version,
+    make_validators,
+    overlay_recipe_flags,
+    strip_recipe_flags,
+)
+from api.constants import BATCH_QUERY_PARAM, STREAMING_CHUNK_SIZE
+from api.db import delete_rows
+from api.serializers import BatchIdsSerializer
+
+
+class StreamingListMixin:
+    """Потоковая выдача непагинированного списка в формате JSON.
+
+    Элементы сериализуются и кодируются по одному по мере чтения из
+    серверного курсора, поэтому пиковая память не зависит от размера
+    списка. Для Browsable API и пагинированных ответов используется
+    обычный list().
+    """
+
+    streaming_chunk_size = STREAMING_CHUNK_SIZE
+
+    def list(self, request, *args, **kwargs):
+        """Список объектов в виде потока JSON-массива."""
+        if (
+            self.paginator is not None
+            or getattr(request.accepted_renderer, 'format', None) != 'json'
+        ):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            self.stream_json(queryset),
+            content_type=request.accepted_renderer.media_type,
+        )
+        return response
+
+    def stream_json(self, queryset):
+        """Генератор частей JSON-массива."""
+        serializer = self.get_serializer()
+        renderer = self.request.accepted_renderer
+        separator = b'['
+        for obj in queryset.iterator(chunk_size=self.streaming_chunk_size):
+            yield separator + renderer.render(
+                serializer.to_representation(obj)
+            )
+            separator = b','
+        yield b'[]' if separator == b'[' else b']'
+
+
+class CatalogMixin:
+    """Выдача полного справочника из заранее закодированного блоба.
+
+    Запрос списка без параметров обслуживается готовыми байтами JSON
+    (или gzip, если клиент его принимает) с ETag по хэшу содержимого.
+    Остальные запросы обрабатываются обычным list().
+    """
+
+    catalog_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        """Полный справочник из блоба или обычный список."""
+        if (
+            request.query_params
+            or getattr(request.accepted_renderer, 'format', None) != 'json'
+        ):
+            return super().list(request, *args, **kwargs)
+        blob = get_catalog_blob(self.catalog_namespace, self.build_catalog)
+        gzipped = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        etag = blob.etag[:-1] + '-gzip"' if gzipped else blob.etag
+        last_modified = blob.version // 1000
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = HttpResponse(
+                blob.gzipped if gzipped else blob.body,
+                content_type=request.accepted_renderer.media_type,
+            )
+            if gzipped:
+                response['Content-Encoding'] = 'gzip'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def build_catalog(self):
+        """Кодирование полного справочника в JSON."""
+        serializer = self.get_serializer(self.get_queryset(), many=True)
+        return self.request.accepted_renderer.render(serializer.data)
+
+
+class IngredientSearchMixin:
+    """Поиск ингредиентов по параметру name через индекс в памяти.
+
+    Включается настройкой INGREDIENT_SEARCH_BACKEND = 'memory'; при
+    значении 'db' поиск выполняет IngredientFilter.
+    """
+
+    search_param = 'name'
+
+    def list(self, request, *args, **kwargs):
+        """Результаты поиска из индекса или обычный список."""
+        query = request.query_params.get(self.search_param)
+        if settings.INGREDIENT_SEARCH_BACKEND != 'memory' or not query:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            get_ingredient_index().search(query, get_search_limit())
+        )
+
+
+class ResponseCacheMixin:
+    """Общий кэш ответов list/retrieve для чтения.
+
+    Ключ строится по нормализованной строке запроса и версии
+    пространства имён cache_namespace, которую сбрасывают сигналы из
+    api.signals. Если cache_user_flags включён, в кэш попадают данные с
+    выключенными флагами is_favorited/is_in_shopping_cart/is_subscribed,
+    а для авторизованного пользователя флаги накладываются поверх.
+    Запросы с параметрами из cache_bypass_params не кэшируются.
+    """
+
+    cache_namespace = None
+    cache_user_flags = False
+    cache_bypass_params = ()
+
+    def list(self, request, *args, **kwargs):
+        """Список объектов с использованием кэша."""
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Объект с использованием кэша."""
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def is_cacheable(self, request):
+        """Можно ли обслужить запрос из общего кэша."""
+        return (
+            settings.RESPONSE_CACHE_TIMEOUT > 0
+            and request.method == 'GET'
+            and getattr(request.accepted_renderer, 'format', None) == 'json'
+            and not any(
+                request.query_params.get(param)
+                for param in self.cache_bypass_params
+            )
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Ответ из кэша или результат handler с сохранением в кэш."""
+        if not self.is_cacheable(request):
+            return handler(request, *args, **kwargs)
+        cache = get_cache()
+        key = get_response_key(request, self.cache_namespace)
+        entry = cache.get(key)
+        if entry is not None:
+            return self.response_from_cache(request, entry)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        if response.streaming:
+            response.streaming_content = self.cache_stream(
+                response.streaming_content, key, response['Content-Type']
+            )
+            return response
+        data = response.data
+        if self.cache_user_flags and request.user.is_authenticated:
+            data = strip_recipe_flags(copy.deepcopy(data))
+        cache.set(key, ('data', data), settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def response_from_cache(self, request, entry):
+        """Восстановление ответа из записи кэша."""
+        if entry[0] == 'content':
+            _, content_type, content = entry
+            return HttpResponse(content, content_type=content_type)
+        data = entry[1]
+        if self.cache_user_flags and request.user.is_authenticated:
+            data = overlay_recipe_flags(data, request.user)
+        return Response(data)
+
+    def cache_stream(self, chunks, key, content_type):
+        """Передача потока клиенту с сохранением тела в кэш по завершении."""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        get_cache().set(
+            key,
+            ('content', content_type, b''.join(parts)),
+            settings.RESPONSE_CACHE_TIMEOUT,
+        )
+
+
+class ConditionalGetMixin:
+    """Условные GET-запросы для list/retrieve.
+
+    ETag и Last-Modified вычисляются по версиям пространств имён из
+    conditional_namespaces (и версии связей пользователя, если включён
+    conditional_user_flags) до выполнения запроса к данным. При
+    совпадении If-None-Match/If-Modified-Since возвращается 304 без
+    сериализации.
+    """
+
+    conditional_namespaces = ()
+    conditional_user_flags = False
+
+    def list(self, request, *args, **kwargs):
+        """Список объектов с поддержкой условных запросов."""
+        return self.conditional_response(
+            self.get_list_validators, super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Объект с поддержкой условных запросов."""
+        return self.conditional_response(
+            self.get_object_validators,
+            super().retrieve,
+            request,
+            *args,
+            **kwargs,
+        )
+
+    def get_stamps(self, request):
+        """Отметки версий, от которых зависит ответ."""
+        stamps = [
+            get_version(namespace)
+            for namespace in self.conditional_namespaces
+        ]
+        if self.conditional_user_flags and request.user.is_authenticated:
+            stamps.append(get_user_version(request.user.pk))
+        return stamps
+
+    def get_list_validators(self, request):
+        """Валидаторы ответа со списком объектов."""
+        return make_validators(request, self.get_stamps(request))
+
+    def get_object_validators(self, request):
+        """Валидаторы ответа с одним объектом."""
+        return make_validators(
+            request,
+            self.get_stamps(request),
+            self.kwargs.get(self.lookup_url_kwarg or self.lookup_field),
+        )
+
+    def conditional_response(self, get_validators, handler, request,
+                             *args, **kwargs):
+        """Ответ 304 по валидаторам или результат handler с валидаторами."""
+        if request.method not in ('GET', 'HEAD'):
+            return handler(request, *args, **kwargs)
+        validators = get_validators(request)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = validators
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+
+class RelationMixin:
+    """Связи пользователя с объектами: избранное, корзина, подписки.
+
+    Добавление и удаление выполняются одним запросом без выборки строки
+    и устойчивы к параллельным запросам: конфликт уникальности
+    игнорирует сама база. Сигналы моделей при этом не вызываются,
+    поэтому инвалидация выполняется в relations_added() и
+    relations_removed(), по умолчанию вызывающих relations_changed().
+    """
+
+    relation_model = None
+    target_model = None
+    target_field = None
+
+    def get_relations(self, request):
+        """Связи текущего пользователя."""
+        return self.relation_model.objects.filter(user=request.user)
+
+    def get_invalid_ids(self, request, ids):
+        """Идентификаторы, связь с которыми недопустима."""
+        return set()
+
+    def relations_changed(self, request, target_ids):
+        """Инвалидация данных, зависящих от изменённых связей."""
+        bump_user_version(request.user.pk)
+
+    def relations_added(self, request, target_ids):
+        """Обработка добавленных связей."""
+        self.relations_changed(request, target_ids)
+
+    def relations_removed(self, request, target_ids):
+        """Обработка удалённых связей."""
+        self.relations_changed(request, target_ids)
+
+    def insert_relations(self, request, target_ids):
+        """Добавление связей через INSERT ... SELECT ... ON CONFLICT.
+
+        Строки выбираются из таблицы объектов, поэтому несуществующие id
+        пропускаются, а уже существующие связи отбрасывает сама база.
+        Возвращает множество id, связи с которыми созданы этим запросом:
+        на PostgreSQL — по RETURNING одного INSERT, на остальных базах —
+        по rowcount отдельного INSERT на каждый id.
+        """
+        target_ids = list(target_ids)
+        if not target_ids:
+            return set()
+        model = self.relation_model
+        connection = connections[router.db_for_write(model)]
+        quote = connection.ops.quote_name
+        instance = model(user=request.user)
+        target = self.target_model._meta
+        target_pk = '{}.{}'.format(
+            quote(target.db_table), quote(target.pk.column)
+        )
+        target_column = model._meta.get_field(self.target_field).column
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        values = []
+        params = []
+        for field in fields:
+            if field.column == target_column:
+                values.append(target_pk)
+            else:
+                values.append('%s')
+                params.append(field.get_db_prep_save(
+                    field.pre_save(instance, True), connection
+                ))
+        returning = connection.features.can_return_rows_from_bulk_insert
+        batches = [target_ids] if returning else [[pk] for pk in target_ids]
+        created = set()
+        with connection.cursor() as cursor:
+            for batch in batches:
+                sql = (
+                    'INSERT INTO {table} ({columns}) SELECT {values} '
+                    'FROM {target} WHERE {target_pk} IN ({ids}) '
+                    'ON CONFLICT DO NOTHING'
+                ).format(
+                    table=quote(model._meta.db_table),
+                    columns=', '.join(quote(field.column) for field in fields),
+                    values=', '.join(values),
+                    target=quote(target.db_table),
+                    target_pk=target_pk,
+                    ids=', '.join(['%s'] * len(batch)),
+                )
+                if returning:
+                    sql += ' RETURNING ' + quote(target_column)
+                cursor.execute(sql, params + batch)
+                if returning:
+                    created.update(row[0] for row in cursor.fetchall())
+                elif cursor.rowcount > 0:
+                    created.update(batch)
+        return created
+
+    def add_relation(self, request, pk):
+        """Добавление связи одним INSERT.
+
+        Возвращает True, если связь создана, и False, если она уже была
+        или объекта pk не существует.
+        """
+        alias = router.db_for_write(self.relation_model)
+        with transaction.atomic(using=alias):
+            created = bool(self.insert_relations(request, [pk]))
+            if created:
+                self.relations_added(request, [pk])
+        return created
+
+    def delete_relations(self, request, target_ids):
+        """Удаление связей с объектами.
+
+        Возвращает множество id, связи с которыми удалены этим запросом:
+        на PostgreSQL — по DELETE ... RETURNING, на остальных базах — по
+        rowcount отдельного DELETE на каждый id.
+        """
+        model = self.relation_model
+        connection = connections[router.db_for_write(model)]
+        if connection.features.can_return_rows_from_bulk_insert:
+            return set(delete_rows(
+                model,
+                returning=self.target_field,
+                user=request.user.pk,
+                **{self.target_field: list(target_ids)},
+            ))
+        return {
+            pk for pk in target_ids
+            if delete_rows(
+                model, user=request.user.pk, **{self.target_field: pk}
+            )
+        }
+
+    def remove_relation(self, request, pk):
+        """Удаление связи одним DELETE, True если она была."""
+        alias = router.db_for_write(self.relation_model)
+        with transaction.atomic(using=alias):
+            deleted = bool(self.delete_relations(request, [pk]))
+            if deleted:
+                self.relations_removed(request, [pk])
+        return deleted
+
+
+class BatchRelationMixin(RelationMixin):
+    """Пакетное добавление и удаление связей пользователя с объектами.
+
+    Принимает список ids в теле запроса (для DELETE также ?ids=1,2),
+    добавляет связи одним INSERT ... ON CONFLICT DO NOTHING и удаляет
+    одним DELETE. Результат для каждого id строится по строкам, которые
+    вернула сама запись (RETURNING), а не по предварительной выборке,
+    поэтому он верен и при параллельных запросах.
+    """
+
+    def get_ids(self, request):
+        """Проверенный список идентификаторов из запроса."""
+        data = request.data
+        if 'ids' not in data and BATCH_QUERY_PARAM in request.query_params:
+            data = {'ids': [
+                value for value in
+                request.query_params[BATCH_QUERY_PARAM].split(',')
+                if value
+            ]}
+        serializer = BatchIdsSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['ids']
+
+    def post(self, request):
+        """Добавление связей с объектами из списка."""
+        ids = self.get_ids(request)
+        invalid = self.get_invalid_ids(request, ids)
+        with transaction.atomic():
+            created = self.insert_relations(
+                request, [pk for pk in ids if pk not in invalid]
+            )
+            if created:
+                self.relations_added(
+                    request, [pk for pk in ids if pk in created]
+                )
+        found = set(
+            self.target_model.objects.filter(pk__in=ids)
+            .values_list('pk', flat=True)
+        )
+        results = []
+        for pk in ids:
+            if pk in created:
+                result = 'created'
+            elif pk not in found:
+                result = 'not_found'
+            elif pk in invalid:
+                result = 'invalid'
+            else:
+                result = 'exists'
+            results.append({'id': pk, 'status': result})
+        return Response({'results': results})
+
+    def delete(self, request):
+        """Удаление связей с объектами из списка."""
+        ids = self.get_ids(request)
+        with transaction.atomic():
+            deleted = self.delete_relations(request, ids)
+            if deleted:
+                self.relations_removed(
+                    request, [pk for pk in ids if pk in deleted]
+                )
+        return Response({'results': [
+            {'id': pk, 'status': 'deleted' if pk in deleted else 'not_found'}
+            for pk in ids
+        ]})
@@ -1,8 +1,299 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from api.constants import (
+    COUNT_ESTIMATE,
+    COUNT_QUERY_PARAM,
+    CURSOR_QUERY_PARAM,
+    PAGE_SIZE,
+    PAGINATION_CURSOR,
+    PAGINATION_QUERY_PARAM,
+)
+
+
+def estimate_count(queryset):
+    """Оценка количества строк по статистике планировщика.
+
+    На PostgreSQL берётся оценка Plan Rows из EXPLAIN, на остальных
+    СУБД выполняется обычный COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    # QuerySet.explain() в Django 3.2 приводит разобранный psycopg2 JSON
+    # к repr списка, поэтому план читается из курсора напрямую.
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор Django с оценочным количеством объектов."""
+
+    @cached_property
+    def count(self):
+        """Оценка количества объектов вместо COUNT(*)."""
+        return estimate_count(self.object_list)
 
 
 class CustomPagination(PageNumberPagination):
     """Кастомный пагинатор."""
 
-    page_size = 6
+    page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Пагинация с опциональной оценкой количества через ?count=."""
+        if request.query_params.get(COUNT_QUERY_PARAM) == COUNT_ESTIMATE:
+            self.django_paginator_class = EstimatedCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+
+class KeysetPagination(BasePagination):
+    """Keyset-пагинация по уникальному набору полей сортировки.
+
+    Курсор хранит значения полей сортировки последнего объекта страницы,
+    поэтому выборка следующей страницы не использует OFFSET и не зависит
+    от глубины.
+    """
+
+    page_size = PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = None
+    cursor_query_param = CURSOR_QUERY_PARAM
+    ordering = ('-id',)
+    invalid_cursor_message = 'Некорректный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Выборка страницы после позиции из курсора."""
+        self.setup(request)
+        self.model = queryset.model
+        if request.query_params.get(COUNT_QUERY_PARAM) == COUNT_ESTIMATE:
+            self.count = estimate_count(queryset)
+
+        position, reverse = self.decode_cursor(request)
+        ordering = self.get_ordering(reverse)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+        self.set_positions(
+            [self._position(obj) for obj in page[:1] + page[-1:]],
+            position, reverse, has_more,
+        )
+        return page
+
+    def setup(self, request):
+        """Параметры запроса, общие для всех страниц."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.count = None
+
+    def get_ordering(self, reverse):
+        """Порядок выборки с учётом направления курсора."""
+        if reverse:
+            return tuple(self._invert(field) for field in self.ordering)
+        return self.ordering
+
+    def set_positions(self, edges, position, reverse, has_more):
+        """Позиции соседних страниц по первой и последней позиции страницы."""
+        self.next_position = self.previous_position = None
+        if edges and (has_more or reverse):
+            self.next_position = edges[-1]
+        if edges and (position is not None) and (not reverse or has_more):
+            self.previous_position = edges[0]
+
+    def get_paginated_response(self, data):
+        """Ответ в формате next/previous/results и опционально count."""
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        """Схема ответа для генератора OpenAPI."""
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'example': 123},
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        """Размер страницы из параметра limit."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        if self.max_page_size:
+            return min(page_size, self.max_page_size)
+        return page_size
+
+    def get_next_link(self):
+        """Ссылка на следующую страницу."""
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        """Ссылка на предыдущую страницу."""
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        """Кодирование позиции в ссылку с параметром cursor."""
+        raw = json.dumps({'p': position, 'r': int(reverse)})
+        token = base64.urlsafe_b64encode(raw.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, token
+        )
+
+    def decode_cursor(self, request):
+        """Разбор курсора из запроса в позицию и направление."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = json.loads(base64.urlsafe_b64decode(token.encode()))
+            position = raw['p']
+            reverse = bool(raw.get('r'))
+            if len(position) != len(self.ordering):
+                raise ValueError
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def _position(self, obj):
+        """Значения полей сортировки объекта в виде строк."""
+        return [
+            str(getattr(obj, field.lstrip('-'))) for field in self.ordering
+        ]
+
+    def _after(self, ordering, position):
+        """Условие «строго после позиции» для составного ключа."""
+        model = self.model
+        condition = Q()
+        equal = {}
+        for field, raw in zip(ordering, position):
+            name = field.lstrip('-')
+            try:
+                value = model._meta.get_field(name).to_python(raw)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    @staticmethod
+    def _invert(field):
+        """Противоположное направление сортировки поля."""
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+
+class RecipeCursorPagination(KeysetPagination):
+    """Keyset-пагинация ленты рецептов по (-pub_date, -id)."""
+
+    ordering = ('-pub_date', '-id')
+
+
+class FeedPagination(RecipeCursorPagination):
+    """Keyset-пагинация ленты, собранной из нескольких источников.
+
+    Источник — queryset со значениями (pub_date, id рецепта) и порядком,
+    который обслуживает его индекс. Из каждого источника читается не
+    больше page_size + 1 строк после позиции курсора, строки сливаются,
+    и из queryset загружаются только рецепты страницы.
+    """
+
+    def paginate_streams(self, streams, queryset, request):
+        """Страница рецептов из источников (queryset, ordering)."""
+        self.setup(request)
+        if request.query_params.get(COUNT_QUERY_PARAM) == COUNT_ESTIMATE:
+            self.count = sum(estimate_count(stream) for stream, _ in streams)
+
+        position, reverse = self.decode_cursor(request)
+        keys = set()
+        for stream, ordering in streams:
+            if reverse:
+                ordering = tuple(self._invert(field) for field in ordering)
+            stream = stream.order_by(*ordering)
+            if position is not None:
+                self.model = stream.model
+                stream = stream.filter(self._after(ordering, position))
+            keys.update(stream.values_list(
+                *(field.lstrip('-') for field in ordering)
+            )[:self.page_size + 1])
+
+        # Рецепт может прийти из двух источников с одинаковым ключом.
+        keys = sorted(keys, reverse=not reverse)[:self.page_size + 1]
+        has_more = len(keys) > self.page_size
+        keys = keys[:self.page_size]
+        if reverse:
+            keys.reverse()
+        self.set_positions(
+            [[str(value) for value in key] for key in keys[:1] + keys[-1:]],
+            position, reverse, has_more,
+        )
+        recipes = queryset.in_bulk([pk for _, pk in keys])
+        return [recipes[pk] for _, pk in keys if pk in recipes]
+
+
+class RecipePagination(CustomPagination):
+    """Пагинатор рецептов с опциональным режимом курсора.
+
+    По умолчанию работает постранично. Режим курсора включается
+    параметром ?pagination=cursor или наличием параметра cursor.
+    """
+
+    cursor_pagination_class = RecipeCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Выбор режима пагинации по параметрам запроса."""
+        self.cursor_paginator = None
+        if (
+            request.query_params.get(PAGINATION_QUERY_PARAM)
+            == PAGINATION_CURSOR
+            or CURSOR_QUERY_PARAM in request.query_params
+        ):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        """Ответ в формате выбранного режима пагинации."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
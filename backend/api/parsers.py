@@ -0,0 +1,56 @@
+import json
+
+from django.conf import settings
+from django.utils.datastructures import MultiValueDict
+from rest_framework import status
+from rest_framework.exceptions import APIException, ParseError
+from rest_framework.parsers import DataAndFiles, MultiPartParser
+
+from api.constants import MULTIPART_DATA_FIELD
+
+
+class UploadTooLarge(APIException):
+    """Тело запроса превышает допустимый размер загрузки."""
+
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Размер загружаемых данных слишком велик.'
+    default_code = 'upload_too_large'
+
+
+class MultiPartJSONParser(MultiPartParser):
+    """multipart/form-data с файлами и JSON в части data.
+
+    Файлы принимаются обработчиками загрузки Django: небольшие остаются
+    в памяти, остальные пишутся во временный файл и затем переносятся в
+    хранилище без чтения в память. Вложенные поля (ингредиенты, теги)
+    передаются JSON-объектом в части data, файлы — отдельными частями
+    с именами полей сериализатора. Запрос длиннее IMAGE_UPLOAD_MAX_SIZE
+    плюс DATA_UPLOAD_MAX_MEMORY_SIZE отклоняется до чтения тела.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        """Разбор тела запроса и объединение части data с файлами."""
+        request = parser_context['request']
+        limit = (
+            settings.IMAGE_UPLOAD_MAX_SIZE
+            + (settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0)
+        )
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > limit:
+            raise UploadTooLarge()
+        parsed = super().parse(stream, media_type, parser_context)
+        if MULTIPART_DATA_FIELD not in parsed.data:
+            return parsed
+        try:
+            data = json.loads(parsed.data[MULTIPART_DATA_FIELD])
+        except ValueError as error:
+            raise ParseError(f'Некорректный JSON в части data: {error}')
+        if not isinstance(data, dict):
+            raise ParseError('Часть data должна быть JSON-объектом.')
+        # Request объединяет data и files через dict.update, что для
+        # MultiValueDict даёт списки, поэтому файлы переносятся здесь.
+        data.update(parsed.files.dict())
+        return DataAndFiles(data, MultiValueDict())
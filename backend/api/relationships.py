@@ -0,0 +1,107 @@
+"""Связи текущего пользователя в пределах одного запроса.
+
+Флаги is_subscribed, is_favorited и is_in_shopping_cart отвечаются из
+множеств в памяти. Идентификаторы объектов страницы заранее передаются
+в prime(), и при первой проверке флага связи загружаются одним запросом
+на вид связи и только для этих объектов.
+"""
+from django.db import models
+from rest_framework import serializers
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscriptions
+
+SUBSCRIBED = 'subscribed'
+FAVORITED = 'favorited'
+IN_SHOPPING_CART = 'in_shopping_cart'
+
+# Вид связи: модель и поле объекта, с которым связан пользователь.
+RELATIONS = {
+    SUBSCRIBED: (Subscriptions, 'author_id'),
+    FAVORITED: (Favorite, 'recipe_id'),
+    IN_SHOPPING_CART: (ShoppingCart, 'recipe_id'),
+}
+
+
+class RelationshipContext:
+    """Ленивый кэш связей пользователя с объектами запроса."""
+
+    def __init__(self, user):
+        """Пустые множества для каждого вида связи."""
+        self.user = user if user is not None and (
+            user.is_authenticated
+        ) else None
+        self.pending = {kind: set() for kind in RELATIONS}
+        self.loaded = {kind: set() for kind in RELATIONS}
+        self.related = {kind: set() for kind in RELATIONS}
+
+    @classmethod
+    def for_request(cls, request):
+        """Контекст, общий для всех сериализаторов запроса."""
+        context = getattr(request, '_relationships', None)
+        if context is None:
+            context = cls(getattr(request, 'user', None))
+            request._relationships = context
+        return context
+
+    def prime(self, kind, ids):
+        """Отложенная загрузка связей для идентификаторов объектов."""
+        if self.user is not None:
+            self.pending[kind].update(
+                pk for pk in ids if pk not in self.loaded[kind]
+            )
+
+    def load(self, kind):
+        """Загрузка связей для всех отложенных идентификаторов."""
+        ids = self.pending[kind]
+        if not ids:
+            return
+        model, field = RELATIONS[kind]
+        self.related[kind].update(
+            model.objects.filter(
+                user=self.user, **{f'{field}__in': ids}
+            ).values_list(field, flat=True)
+        )
+        self.loaded[kind].update(ids)
+        self.pending[kind] = set()
+
+    def has(self, kind, pk):
+        """Связан ли пользователь с объектом pk."""
+        if self.user is None:
+            return False
+        if pk not in self.loaded[kind]:
+            self.pending[kind].add(pk)
+            self.load(kind)
+        return pk in self.related[kind]
+
+
+def get_relationships(context):
+    """Контекст связей из контекста сериализатора или None."""
+    request = context.get('request')
+    if request is None:
+        return None
+    return RelationshipContext.for_request(request)
+
+
+def prime_recipe_relationships(relationships, recipes):
+    """Отложенная загрузка флагов рецептов и подписок на их авторов."""
+    recipe_ids = [recipe.pk for recipe in recipes]
+    relationships.prime(FAVORITED, recipe_ids)
+    relationships.prime(IN_SHOPPING_CART, recipe_ids)
+    relationships.prime(
+        SUBSCRIBED, [recipe.author_id for recipe in recipes]
+    )
+
+
+class PrimedListSerializer(serializers.ListSerializer):
+    """Список, заранее передающий объекты страницы в prime_relationships."""
+
+    def to_representation(self, data):
+        """Сериализация с предварительной подготовкой связей."""
+        items = list(
+            data.all() if isinstance(data, models.Manager) else data
+        )
+        relationships = get_relationships(self.context)
+        if relationships is not None:
+            self.child.prime_relationships(relationships, items)
+        return super().to_representation(items)
@@ -0,0 +1,40 @@
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSON-рендерер с ускоренным кодированием.
+
+    Если установлен orjson, компактные ответы кодируются им, иначе
+    используется стандартный рендерер DRF. Ответы с отступами (например,
+    для Browsable API) всегда кодируются стандартным способом.
+    """
+
+    def __init__(self):
+        """Подготовка функции кодирования типов, неизвестных orjson."""
+        self.default = encoders.JSONEncoder().default
+        if orjson is not None:
+            self.options = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Кодирование данных в JSON."""
+        if data is None:
+            return b''
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=self.default, option=self.options)
+        # Как и JSONRenderer, экранируем U+2028 и U+2029 для совместимости
+        # с JavaScript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
@@ -0,0 +1,114 @@
+"""Скомпилированные представления рецептов только для чтения.
+
+Функции строят ровно ту же структуру, что RecipeSerializer,
+MyUserSerializer, TagSerializer и AmountIngredientSerializer, но
+напрямую из подгруженных объектов (см. RecipeQuerySet.with_related),
+без обхода полей DRF для каждого объекта.
+"""
+from api.images import get_variant_urls
+from api.relationships import (
+    FAVORITED,
+    IN_SHOPPING_CART,
+    SUBSCRIBED,
+    RelationshipContext,
+)
+
+
+class RecipeRepresentation:
+    """Построитель представлений рецептов для одного запроса."""
+
+    def __init__(self, context):
+        """Подготовка данных запроса, общих для всех объектов."""
+        self.request = context.get('request')
+        user = getattr(self.request, 'user', None)
+        self.user = user if user is not None and (
+            user.is_authenticated
+        ) else None
+        if self.request is not None:
+            self.build_url = self.request.build_absolute_uri
+            self.relationships = RelationshipContext.for_request(
+                self.request
+            )
+        else:
+            self.build_url = None
+            self.relationships = RelationshipContext(None)
+
+    def file_url(self, value):
+        """URL файла так же, как в serializers.ImageField."""
+        if not value:
+            return None
+        try:
+            url = value.url
+        except AttributeError:
+            return None
+        if self.build_url is not None:
+            return self.build_url(url)
+        return url
+
+    def is_subscribed(self, author):
+        """Флаг подписки текущего пользователя на автора."""
+        if self.user is None:
+            return False
+        flag = getattr(author, 'is_subscribed', None)
+        if flag is not None:
+            return flag
+        return self.relationships.has(SUBSCRIBED, author.pk)
+
+    def is_favorited(self, recipe):
+        """Флаг нахождения рецепта в избранном."""
+        if self.user is None:
+            return False
+        flag = getattr(recipe, 'is_favorited', None)
+        if flag is not None:
+            return flag
+        return self.relationships.has(FAVORITED, recipe.pk)
+
+    def is_in_shopping_cart(self, recipe):
+        """Флаг нахождения рецепта в корзине."""
+        if self.user is None:
+            return False
+        flag = getattr(recipe, 'is_in_shopping_cart', None)
+        if flag is not None:
+            return flag
+        return self.relationships.has(IN_SHOPPING_CART, recipe.pk)
+
+    def user_data(self, user):
+        """Представление пользователя как в MyUserSerializer."""
+        return {
+            'id': user.id,
+            'email': user.email,
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'is_subscribed': self.is_subscribed(user),
+            'avatar': self.file_url(user.avatar),
+            'avatar_variants': get_variant_urls(user.avatar, self.build_url),
+        }
+
+    def recipe_data(self, recipe):
+        """Представление рецепта как в RecipeSerializer."""
+        author = recipe.author
+        return {
+            'id': recipe.id,
+            'tags': [
+                {'id': tag.id, 'name': tag.name, 'slug': tag.slug}
+                for tag in recipe.tags.all()
+            ],
+            'author': None if author is None else self.user_data(author),
+            'ingredients': [
+                {
+                    'id': item.ingredient.id,
+                    'name': item.ingredient.name,
+                    'amount': item.amount,
+                    'measurement_unit': item.ingredient.measurement_unit,
+                }
+                for item in recipe.recipe.all()
+            ],
+            'is_favorited': self.is_favorited(recipe),
+            'is_in_shopping_cart': self.is_in_shopping_cart(recipe),
+            'name': recipe.name,
+            'image': self.file_url(recipe.image),
+            'image_variants': get_variant_urls(recipe.image, self.build_url),
+            'text': recipe.text,
+            'cooking_time': recipe.cooking_time,
+        }
@@ -0,0 +1,116 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from api.cache import get_version
+from recipes.models import Ingredient
+
+TRIGRAM = 3
+
+
+def trigrams(text):
+    """Множество триграмм строки."""
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+class IngredientIndex:
+    """Поисковый индекс по названиям ингредиентов в памяти процесса.
+
+    Префиксные совпадения ищутся двоичным поиском по отсортированному
+    массиву названий, вхождения подстроки — по пересечению списков
+    триграмм с последующей проверкой. Результат: сначала совпадения по
+    префиксу, затем по подстроке, каждая группа в алфавитном порядке.
+    """
+
+    def __init__(self, rows):
+        """Построение индекса по строкам (id, name, measurement_unit)."""
+        self.rows = sorted(
+            (
+                {'id': pk, 'name': name, 'measurement_unit': unit}
+                for pk, name, unit in rows
+            ),
+            key=lambda row: (row['name'].lower(), row['id']),
+        )
+        self.names = [row['name'].lower() for row in self.rows]
+        self.postings = {}
+        for position, name in enumerate(self.names):
+            for trigram in trigrams(name):
+                self.postings.setdefault(trigram, []).append(position)
+
+    def search(self, query, limit=None):
+        """Ингредиенты, название которых содержит query."""
+        query = query.lower()
+        if not query:
+            return self.rows[:limit]
+        start = bisect_left(self.names, query)
+        end = start
+        while end < len(self.names) and self.names[end].startswith(query):
+            end += 1
+        result = self.rows[start:end]
+        if limit is not None and len(result) >= limit:
+            return result[:limit]
+        for position in self.candidates(query):
+            if start <= position < end:
+                continue
+            if query in self.names[position]:
+                result.append(self.rows[position])
+                if limit is not None and len(result) >= limit:
+                    break
+        return result
+
+    def candidates(self, query):
+        """Позиции названий, которые могут содержать query, по порядку."""
+        if len(query) < TRIGRAM:
+            return range(len(self.names))
+        postings = sorted(
+            (self.postings.get(trigram, ()) for trigram in trigrams(query)),
+            key=len,
+        )
+        positions = set(postings[0])
+        for posting in postings[1:]:
+            positions.intersection_update(posting)
+            if not positions:
+                break
+        return sorted(positions)
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def is_fresh(index, version):
+    """Индекс построен для версии version и не старше срока жизни."""
+    return (
+        index is not None
+        and index[0] == version
+        and time.monotonic() - index[1] < settings.INGREDIENT_INDEX_TTL
+    )
+
+
+def get_ingredient_index():
+    """Индекс ингредиентов, перестраиваемый при изменении справочника.
+
+    Индекс также перестраивается по истечении INGREDIENT_INDEX_TTL
+    секунд: процесс может не видеть версию, изменённую в другом
+    процессе, например командой load_ingredients при кэше locmem.
+    """
+    global _index
+    version = get_version('ingredients')
+    if is_fresh(_index, version):
+        return _index[2]
+    with _lock:
+        if not is_fresh(_index, version):
+            index = IngredientIndex(
+                Ingredient.objects.values_list(
+                    'id', 'name', 'measurement_unit'
+                ).iterator()
+            )
+            _index = (version, time.monotonic(), index)
+    return _index[2]
+
+
+def get_search_limit():
+    """Ограничение количества результатов поиска или None."""
+    return settings.INGREDIENT_SEARCH_LIMIT or None
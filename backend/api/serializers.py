@@ -1,9 +1,12 @@
+import uuid
+
 from django.core.validators import (
     MaxValueValidator,
     MinValueValidator,
 )
+from django.db import transaction
+from django.utils.functional import cached_property
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import (
     UniqueTogetherValidator,
@@ -15,9 +18,24 @@ from recipes.models import (
     Ingredient,
     Recipe,
     ShoppingCart,
+    ShoppingTotal,
     Tag,
 )
+from api.db import delete_rows
+from api.images import get_variant_urls
+from api.relationships import (
+    FAVORITED,
+    IN_SHOPPING_CART,
+    SUBSCRIBED,
+    PrimedListSerializer,
+    get_relationships,
+    prime_recipe_relationships,
+)
+from api.representations import RecipeRepresentation
+from api.shopping import recipe_ingredients_changed
+from api.uploads import check_upload_size, decode_base64_upload
 from api.constants import (
+    BATCH_MAX_SIZE,
     DEFAULT_VALUE,
     VALIDATOR_MAX_VALUE,
     VALIDATOR_MIN_VALUE,
@@ -25,6 +43,55 @@ from api.constants import (
 from users.models import MyUser, Subscriptions
 
 
+class ImageVariantsField(serializers.Field):
+    """URL уменьшенных вариантов изображения (см. api.images)."""
+
+    def __init__(self, **kwargs):
+        """Поле только для чтения."""
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        """Абсолютные URL вариантов по форматам."""
+        request = self.context.get('request')
+        return get_variant_urls(
+            value, request.build_absolute_uri if request else None
+        )
+
+
+class ImageUploadField(serializers.ImageField):
+    """Изображение из multipart-файла или строки data URL с base64.
+
+    Строка base64 декодируется частями (см. api.uploads), размер файла
+    ограничен IMAGE_UPLOAD_MAX_SIZE. Сохранённый файл получает имя из
+    uuid и расширения по формату, определённому Pillow.
+    """
+
+    def to_internal_value(self, data):
+        """Проверка изображения и выбор имени файла."""
+        if data in ('', None):
+            self.fail('required')
+        if isinstance(data, str):
+            data = decode_base64_upload(data)
+        else:
+            check_upload_size(getattr(data, 'size', 0) or 0)
+        file = super().to_internal_value(data)
+        image_format = file.image.format.lower()
+        extension = 'jpg' if image_format == 'jpeg' else image_format
+        file.name = f'{uuid.uuid4()}.{extension}'
+        return file
+
+
+class AvatarSerializer(serializers.ModelSerializer):
+    """Сериализатор для загрузки аватара."""
+
+    avatar = ImageUploadField()
+
+    class Meta:
+        model = MyUser
+        fields = ['avatar']
+
+
 class MyUserCreateSerializer(UserCreateSerializer):
     """Сериализатор для создания пользователя."""
 
@@ -47,6 +114,7 @@ class MyUserSerializer(UserSerializer):
 
     is_subscribed = serializers.SerializerMethodField(read_only=True)
     avatar = serializers.ImageField(required=False, allow_null=True)
+    avatar_variants = ImageVariantsField(source='avatar')
 
     class Meta:
         model = MyUser
@@ -58,7 +126,13 @@ class MyUserSerializer(UserSerializer):
             'last_name',
             'is_subscribed',
             'avatar',
+            'avatar_variants',
         ]
+        list_serializer_class = PrimedListSerializer
+
+    def prime_relationships(self, relationships, users):
+        """Подготовка флагов подписки для пользователей страницы."""
+        relationships.prime(SUBSCRIBED, [user.pk for user in users])
 
     def get_is_subscribed(self, obj):
         """Проверка, подписан ли пользователь на автора."""
@@ -67,7 +141,9 @@ class MyUserSerializer(UserSerializer):
         request = self.context.get('request')
         if request is None or request.user.is_anonymous:
             return False
-        return obj.subscribers.filter(user=request.user).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return get_relationships(self.context).has(SUBSCRIBED, obj.pk)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -135,6 +211,7 @@ class RecipeSerializer(serializers.ModelSerializer):
     is_in_shopping_cart = serializers.SerializerMethodField(
         method_name='get_is_in_shopping_cart'
     )
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = Recipe
@@ -147,30 +224,77 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time',
         ]
+        list_serializer_class = PrimedListSerializer
+
+    def prime_relationships(self, relationships, recipes):
+        """Подготовка флагов для рецептов страницы и их авторов."""
+        prime_recipe_relationships(relationships, recipes)
 
     def get_is_favorite(self, obj):
         """Получение информации о том, является ли рецепт избранным."""
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        return obj.favorites.filter(user=request.user).exists()
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        return get_relationships(self.context).has(FAVORITED, obj.pk)
 
     def get_is_in_shopping_cart(self, obj):
         """Получение информации о том, находится ли рецепт в корзине."""
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        return obj.cart.filter(user=request.user).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        return get_relationships(self.context).has(
+            IN_SHOPPING_CART, obj.pk
+        )
+
+
+class CompiledRecipeSerializer(serializers.BaseSerializer):
+    """Быстрый сериализатор рецептов только для чтения.
+
+    Возвращает то же представление, что RecipeSerializer, используя
+    скомпилированные функции из api.representations.
+    """
+
+    class Meta:
+        list_serializer_class = PrimedListSerializer
+
+    @cached_property
+    def representation(self):
+        """Построитель представлений для текущего запроса."""
+        return RecipeRepresentation(self.context)
+
+    def prime_relationships(self, relationships, recipes):
+        """Подготовка флагов для рецептов страницы и их авторов."""
+        prime_recipe_relationships(relationships, recipes)
+
+    def to_representation(self, instance):
+        """Преобразование рецепта в сериализованный вид."""
+        return self.representation.recipe_data(instance)
 
 
 class AddIngredientRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор добавления ингредиента в рецепт."""
 
     id = serializers.IntegerField()
-    amount = serializers.IntegerField()
+    amount = serializers.IntegerField(
+        validators=[
+            MinValueValidator(
+                VALIDATOR_MIN_VALUE,
+                'Количество должно быть больше 0',
+            ),
+            MaxValueValidator(
+                VALIDATOR_MAX_VALUE,
+                'Количество должно быть меньше 32000',
+            ),
+        ],
+    )
 
     class Meta:
         model = AmountIngredient
@@ -182,11 +306,8 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
 
     author = MyUserSerializer(read_only=True)
     ingredients = AddIngredientRecipeSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True,
-    )
-    image = Base64ImageField()
+    tags = serializers.ListField(child=serializers.IntegerField())
+    image = ImageUploadField()
     cooking_time = serializers.IntegerField(
         default=DEFAULT_VALUE,
         validators=[
@@ -214,18 +335,44 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'cooking_time',
         ]
 
+    def validate_tags(self, value):
+        """Теги по идентификаторам одним запросом."""
+        tag_ids = list(dict.fromkeys(value))
+        tags = Tag.objects.in_bulk(tag_ids)
+        missing = [pk for pk in tag_ids if pk not in tags]
+        if missing:
+            raise serializers.ValidationError(
+                'Теги не найдены: ' + ', '.join(map(str, missing))
+            )
+        return [tags[pk] for pk in tag_ids]
+
     def validate(self, data):
-        """Валидация данных для создания рецепта."""
-        ingredients = self.initial_data.get('ingredients')
+        """Валидация данных для создания рецепта.
+
+        Все ингредиенты проверяются одним запросом до любых записей в
+        базу; найденные объекты передаются в create и update.
+        """
+        ingredients = data.get('ingredients')
         if not ingredients:
             raise serializers.ValidationError(
                 {'ingredients': 'Добавьте хотя бы один ингредиент'}
             )
-        ingredient_ids = [ingredient.get('id') for ingredient in ingredients]
+        ingredient_ids = [ingredient['id'] for ingredient in ingredients]
         if len(ingredient_ids) != len(set(ingredient_ids)):
             raise serializers.ValidationError(
                 {'ingredients': 'Ингредиенты должны быть уникальными'}
             )
+        found = Ingredient.objects.in_bulk(ingredient_ids)
+        missing = [pk for pk in ingredient_ids if pk not in found]
+        if missing:
+            raise serializers.ValidationError({
+                'ingredients': 'Ингредиенты не найдены: '
+                + ', '.join(map(str, missing))
+            })
+        data['ingredients'] = [
+            {**ingredient, 'ingredient': found[ingredient['id']]}
+            for ingredient in ingredients
+        ]
         return data
 
     def create_ingredients(self, recipe, ingredients):
@@ -233,39 +380,105 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         amount_ingredients = [
             AmountIngredient(
                 recipe=recipe,
-                ingredient_id=ingredient['id'],
+                ingredient=ingredient['ingredient'],
                 amount=ingredient['amount'],
             ) for ingredient in ingredients
         ]
         AmountIngredient.objects.bulk_create(amount_ingredients)
 
     def create(self, validated_data):
-        """Создание рецепта."""
+        """Создание рецепта одной транзакцией.
+
+        Теги и ингредиенты уже проверены в validate, поэтому связи
+        вставляются bulk_create без повторных проверок. Кэш ответов
+        сбрасывается сигналом post_save рецепта.
+        """
         ingredients = validated_data.pop('ingredients')
         tags = validated_data.pop('tags')
         author = self.context.get('request').user
-        recipe = Recipe.objects.create(author=author, **validated_data)
-        recipe.tags.set(tags)
-        self.create_ingredients(recipe, ingredients)
+        with transaction.atomic():
+            recipe = Recipe.objects.create(author=author, **validated_data)
+            Recipe.tags.through.objects.bulk_create([
+                Recipe.tags.through(recipe=recipe, tag=tag) for tag in tags
+            ])
+            self.create_ingredients(recipe, ingredients)
         return recipe
 
+    def update_ingredients(self, recipe, ingredients):
+        """Применение разницы между текущими и новыми ингредиентами.
+
+        Новые строки создаются одним bulk_create, лишние удаляются одним
+        DELETE ... IN, изменённые количества обновляются одним
+        bulk_update. Сигналы строк при этом не отправляются, поэтому
+        итоги и списки покупок обновляются тем же
+        recipe_ingredients_changed, что вызывают сигналы, один раз на
+        рецепт. Возвращает идентификаторы затронутых ингредиентов.
+        """
+        amounts = {
+            ingredient['id']: ingredient['amount']
+            for ingredient in ingredients
+        }
+        current = {
+            item.ingredient_id: item
+            for item in AmountIngredient.objects.filter(
+                recipe=recipe
+            ).only('id', 'ingredient_id', 'amount')
+        }
+        created = [
+            AmountIngredient(
+                recipe=recipe,
+                ingredient=ingredient['ingredient'],
+                amount=ingredient['amount'],
+            )
+            for ingredient in ingredients
+            if ingredient['id'] not in current
+        ]
+        deleted = [
+            item for ingredient_id, item in current.items()
+            if ingredient_id not in amounts
+        ]
+        updated = []
+        for ingredient_id, item in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and amount != item.amount:
+                item.amount = amount
+                updated.append(item)
+        if deleted:
+            delete_rows(AmountIngredient, id=[item.pk for item in deleted])
+        if updated:
+            AmountIngredient.objects.bulk_update(updated, ['amount'])
+        if created:
+            AmountIngredient.objects.bulk_create(created)
+        changed = {
+            item.ingredient_id for item in (*created, *deleted, *updated)
+        }
+        if changed:
+            recipe_ingredients_changed(recipe.pk, changed)
+        return changed
+
     def update(self, instance, validated_data):
-        """Обновление рецепта."""
-        if 'ingredients' in self.initial_data:
-            ingredients = self.initial_data.get('ingredients')
-            instance.ingredients.clear()
-            self.create_ingredients(instance, ingredients)
-        if 'tags' in validated_data:
-            tags = validated_data.pop('tags')
-            instance.tags.set(tags)
-        validated_data.pop('ingredients', None)
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        """Обновление рецепта одной транзакцией."""
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
+        with transaction.atomic():
+            if tags is not None:
+                instance.tags.set(tags)
+            if ingredients is not None:
+                self.update_ingredients(instance, ingredients)
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
         return instance
 
     def to_representation(self, instance):
-        """Преобразование рецепта в сериализованный вид."""
+        """Преобразование рецепта в сериализованный вид.
+
+        Рецепт перечитывается с подгруженными связями, чтобы ответ
+        строился фиксированным числом запросов.
+        """
+        instance = Recipe.objects.with_related(
+            self.context['request'].user
+        ).get(pk=instance.pk)
         return RecipeSerializer(instance, context=self.context).data
 
 
@@ -289,6 +502,35 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         return RecipeSerializer(instance.recipe, context=self.context).data
 
 
+class BatchIdsSerializer(serializers.Serializer):
+    """Сериализатор списка идентификаторов для пакетных операций."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BATCH_MAX_SIZE,
+    )
+
+    def validate_ids(self, value):
+        """Удаление повторов с сохранением порядка."""
+        return list(dict.fromkeys(value))
+
+
+class ShoppingTotalSerializer(serializers.ModelSerializer):
+    """Сериализатор итогового количества ингредиента в корзине."""
+
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
+    )
+    amount = serializers.ReadOnlyField(source='total')
+
+    class Meta:
+        model = ShoppingTotal
+        fields = ['id', 'name', 'measurement_unit', 'amount']
+
+
 class FavoriteSerializer(serializers.ModelSerializer):
     """Сериализатор для избранного."""
 
@@ -320,6 +562,17 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         return MyUserSerializer(instance.author, context=self.context).data
 
 
+class ShortRecipeSerializer(serializers.ModelSerializer):
+    """Краткое представление рецепта."""
+
+    image = serializers.ImageField(read_only=True)
+    image_variants = ImageVariantsField(source='image')
+
+    class Meta:
+        model = Recipe
+        fields = ['id', 'name', 'image', 'image_variants', 'cooking_time']
+
+
 class ShowSubscriptionsSerializer(serializers.ModelSerializer):
     """Сериализатор для отображения подписок."""
 
@@ -346,32 +599,28 @@ class ShowSubscriptionsSerializer(serializers.ModelSerializer):
         ]
 
     def get_recipes(self, obj):
-        """Получение рецептов для подписки."""
-        request = self.context['request']
-        recipes_limit = request.query_params.get('recipes_limit')
-        recipes = obj.author.recipes.all()
-        if recipes_limit:
-            recipes = recipes[: int(recipes_limit)]
-        return RecipeSerializer(recipes, many=True, context=self.context).data
+        """Получение рецептов для подписки.
+
+        Рецепты страницы подгружаются во view одним запросом (см.
+        ShowSubscriptionsViewSet), иначе читаются по автору.
+        """
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            recipes = obj.author.recipes.all()
+            recipes_limit = self.context.get('recipes_limit')
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
+        return ShortRecipeSerializer(
+            recipes, many=True, context=self.context
+        ).data
 
     def get_recipes_count(self, obj):
         """Получение количества рецептов для подписки."""
+        recipes_count = getattr(obj, 'recipes_count', None)
+        if recipes_count is not None:
+            return recipes_count
         return obj.author.recipes.count()
 
     def get_is_subscribed(self, obj):
         """Получение информации о том, подписан ли пользователь на автора."""
         return True
-
-
-pattern = r'''
-.* город.? (?P<city>[а-яА-я]+) .*? улиц.? (?P<street>[а-яА-я]+) .*? дом.? (?P<number>\d+) .*? квартир.? (?P<flat>\d+)[.,]?
-'''
-
-pattern = r'''
-.* город.? (?P<city>[а-яА-я]+) .*? улиц.? (?P<street>[а-яА-я]+) .*? дом.? (?P<number>\d+) .*? квартир.? (?P<flat>\d+)
-'''
-
-for address in addresses:
-    match = re.search(pattern, address)
-    if match:
-        print(match.groupdict())
@@ -0,0 +1,288 @@
+import csv
+import hashlib
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Sum
+
+from api.cache import bump_version, get_cache, get_version
+from api.constants import (
+    FONT_NAME,
+    FONT_SIZE,
+    FONT_SIZE_SMALL,
+    PAGE_INGREDIENT_X,
+    PAGE_INGREDIENT_Y,
+    PAGE_INGREDIENT_Y_STEP,
+    PAGE_MARGIN,
+    PAGE_TITLE_X,
+    PAGE_TITLE_Y,
+    STREAMING_CHUNK_SIZE,
+)
+from recipes.models import AmountIngredient, ShoppingCart, ShoppingTotal
+
+User = get_user_model()
+
+CART_NAMESPACE = 'cart:{user_id}'
+PDF_KEY = 'api:shopping-pdf:{user_id}:{cart_version}:{catalog_version}'
+
+
+@lru_cache(maxsize=None)
+def load_pdf_backend():
+    """Импорт ReportLab и регистрация шрифта при первом использовании.
+
+    Возвращает пару (canvas.Canvas, размер страницы). Вызывается из
+    gunicorn.conf.py в мастер-процессе при preload_app, чтобы воркеры
+    получили уже загруженный модуль после fork.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfgen import canvas
+
+    pdfmetrics.registerFont(
+        TTFont(FONT_NAME, settings.SHOPPING_LIST_FONT_PATH)
+    )
+    return canvas.Canvas, A4
+
+
+def get_cart_version(user_id):
+    """Версия содержимого корзины пользователя."""
+    return get_version(CART_NAMESPACE.format(user_id=user_id))
+
+
+def bump_cart_version(*user_ids):
+    """Инвалидация списков покупок пользователей."""
+    bump_version(
+        *(CART_NAMESPACE.format(user_id=user_id) for user_id in user_ids)
+    )
+
+
+def bump_recipe_carts(*recipe_ids):
+    """Инвалидация списков покупок всех, у кого рецепт в корзине."""
+    user_ids = set(
+        ShoppingCart.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('user_id', flat=True)
+    )
+    if user_ids:
+        bump_cart_version(*user_ids)
+
+
+def get_shopping_list(user):
+    """Суммарное количество ингредиентов рецептов из корзины.
+
+    Читается из таблицы итогов ShoppingTotal одним запросом.
+    """
+    return (
+        ShoppingTotal.objects.filter(user=user)
+        .values(
+            'ingredient__name',
+            'ingredient__measurement_unit',
+            total_amount=F('total'),
+        )
+        .order_by('ingredient__name')
+    )
+
+
+def calculate_totals(user_ids, ingredient_ids=None):
+    """Итоги пользователей, посчитанные по рецептам корзин."""
+    totals = AmountIngredient.objects.filter(
+        recipe__cart__user_id__in=user_ids
+    )
+    if ingredient_ids is not None:
+        totals = totals.filter(ingredient_id__in=ingredient_ids)
+    return (
+        totals.values('recipe__cart__user_id', 'ingredient_id')
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+
+
+def refresh_shopping_totals(ingredient_ids, user_ids=None, recipe_id=None):
+    """Пересчёт итогов для изменённых пар пользователь — ингредиент.
+
+    Пользователи задаются списком user_ids или рецептом recipe_id, тогда
+    берутся все, у кого рецепт в корзине. Строки пользователей
+    блокируются, поэтому параллельные пересчёты не пересекаются.
+    """
+    ingredient_ids = set(ingredient_ids)
+    if not ingredient_ids:
+        return
+    if recipe_id is not None:
+        user_ids = ShoppingCart.objects.filter(
+            recipe_id=recipe_id
+        ).values('user_id')
+    with transaction.atomic():
+        user_ids = list(
+            User.objects.select_for_update()
+            .filter(pk__in=user_ids)
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        if not user_ids:
+            return
+        ShoppingTotal.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=ingredient_ids
+        ).delete()
+        ShoppingTotal.objects.bulk_create(
+            ShoppingTotal(
+                user_id=row['recipe__cart__user_id'],
+                ingredient_id=row['ingredient_id'],
+                total=row['total'],
+            )
+            for row in calculate_totals(user_ids, ingredient_ids)
+        )
+
+
+def recipe_ingredients_changed(recipe_id, ingredient_ids):
+    """Итоги и списки покупок после изменения ингредиентов рецепта.
+
+    Единственное место, где поддерживаются итоги при изменении строк
+    AmountIngredient: его вызывают и сигналы строк, и массовое изменение
+    ингредиентов в обход сигналов (см.
+    RecipeCreateSerializer.update_ingredients).
+    """
+    refresh_shopping_totals(ingredient_ids, recipe_id=recipe_id)
+    bump_recipe_carts(recipe_id)
+
+
+def cart_changed(user_id, recipe_ids):
+    """Инвалидация после изменения корзины в обход сигналов моделей."""
+    bump_cart_version(user_id)
+    refresh_shopping_totals(
+        AmountIngredient.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('ingredient_id', flat=True),
+        user_ids=[user_id],
+    )
+
+
+def rebuild_shopping_totals(user_ids):
+    """Полный пересчёт итогов пользователей."""
+    with transaction.atomic():
+        ShoppingTotal.objects.filter(user_id__in=user_ids).delete()
+        ShoppingTotal.objects.bulk_create(
+            ShoppingTotal(
+                user_id=row['recipe__cart__user_id'],
+                ingredient_id=row['ingredient_id'],
+                total=row['total'],
+            )
+            for row in calculate_totals(user_ids)
+        )
+
+
+def iter_shopping_list(user):
+    """Строки списка покупок, читаемые серверным курсором."""
+    return get_shopping_list(user).iterator(chunk_size=STREAMING_CHUNK_SIZE)
+
+
+def format_line(ingredient):
+    """Строка списка покупок в текстовом виде."""
+    return '{} ({}) - {}'.format(
+        ingredient['ingredient__name'],
+        ingredient['ingredient__measurement_unit'],
+        ingredient['total_amount'],
+    )
+
+
+def stream_txt(ingredients):
+    """Генератор списка покупок в текстовом формате."""
+    yield 'Список покупок\n\n'
+    for ingredient in ingredients:
+        yield format_line(ingredient) + '\n'
+
+
+class Echo:
+    """Псевдо-файл, возвращающий записанную строку."""
+
+    def write(self, value):
+        """Возврат значения вместо записи."""
+        return value
+
+
+def stream_csv(ingredients):
+    """Генератор списка покупок в формате CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(['name', 'measurement_unit', 'amount'])
+    for ingredient in ingredients:
+        yield writer.writerow([
+            ingredient['ingredient__name'],
+            ingredient['ingredient__measurement_unit'],
+            ingredient['total_amount'],
+        ])
+
+
+def render_pdf(ingredients, stream):
+    """Отрисовка списка покупок в PDF с записью в файловый объект."""
+    canvas_class, pagesize = load_pdf_backend()
+    p = canvas_class(stream, pagesize=pagesize)
+
+    p.setFont(FONT_NAME, FONT_SIZE)
+
+    p.drawString(PAGE_TITLE_X, PAGE_TITLE_Y, 'Список покупок')
+    p.setFont(FONT_NAME, FONT_SIZE_SMALL)
+
+    y = PAGE_INGREDIENT_Y
+    for ingredient in ingredients:
+        text = format_line(ingredient)
+        p.drawString(PAGE_INGREDIENT_X, y, text)
+        y -= PAGE_INGREDIENT_Y_STEP
+        if y < PAGE_MARGIN:
+            p.showPage()
+            y = PAGE_INGREDIENT_Y
+            p.setFont(FONT_NAME, FONT_SIZE_SMALL)
+
+    p.save()
+
+
+def get_pdf_key(user):
+    """Ключ кэша PDF по версии корзины и справочника ингредиентов."""
+    return PDF_KEY.format(
+        user_id=user.pk,
+        cart_version=get_cart_version(user.pk),
+        catalog_version=get_version('ingredients'),
+    )
+
+
+def get_cached_pdf(user):
+    """Пара (etag, pdf) из кэша или None."""
+    return get_cache().get(get_pdf_key(user))
+
+
+def render_pdf_bytes(ingredients):
+    """PDF списка покупок в виде байтов.
+
+    Не обращается к базе данных, поэтому выполняется в процессах пула
+    фоновых задач (см. api.jobs).
+    """
+    stream = BytesIO()
+    render_pdf(ingredients, stream)
+    return stream.getvalue()
+
+
+def store_pdf(key, pdf):
+    """Сохранение PDF в кэш под ключом версии корзины, возврат ETag."""
+    etag = '"{}"'.format(hashlib.sha256(pdf).hexdigest()[:32])
+    get_cache().set(
+        key, (etag, pdf), settings.SHOPPING_LIST_CACHE_TIMEOUT
+    )
+    return etag
+
+
+def build_pdf(user, stream):
+    """Отрисовка PDF в stream и сохранение в кэш.
+
+    stream должен поддерживать getvalue(), например HttpResponse.
+    Возвращает ETag или None, если корзина пуста. Ключ вычисляется до
+    чтения корзины, поэтому изменение корзины во время отрисовки не
+    приведёт к сохранению устаревшего файла под новой версией.
+    """
+    key = get_pdf_key(user)
+    ingredients = list(get_shopping_list(user))
+    if not ingredients:
+        return None
+    render_pdf(ingredients, stream)
+    return store_pdf(key, stream.getvalue())
@@ -0,0 +1,331 @@
+import logging
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.authentication import invalidate_tokens, invalidate_user_tokens
+from api.cache import bump_user_version, bump_version
+from api.feed import fan_out_recipe, follow, unfollow
+from api.images import make_variants
+from api.shopping import (
+    bump_cart_version,
+    bump_recipe_carts,
+    recipe_ingredients_changed,
+    refresh_shopping_totals,
+)
+from recipes.models import (
+    AmountIngredient,
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Subscriptions
+
+User = get_user_model()
+
+logger = logging.getLogger(__name__)
+
+# Пространства имён кэша ответов и модели, от которых они зависят.
+CACHE_DEPENDENCIES = {
+    Recipe: ('recipes',),
+    AmountIngredient: ('recipes',),
+    Tag: ('recipes', 'tags'),
+    Ingredient: ('recipes', 'ingredients'),
+    User: ('recipes', 'users'),
+}
+
+# Поля изображений, для которых создаются уменьшенные варианты.
+IMAGE_FIELDS = {
+    Recipe: 'image',
+    User: 'avatar',
+}
+
+# Модели связей пользователя, влияющие на его флаги в ответах.
+USER_RELATIONS = (Favorite, ShoppingCart, Subscriptions)
+
+
+def invalidate_response_cache(sender, **kwargs):
+    """Сброс кэша ответов, зависящих от изменённой модели."""
+    update_fields = kwargs.get('update_fields')
+    if sender is User and update_fields and set(update_fields) <= {
+        'last_login'
+    }:
+        return
+    bump_version(*CACHE_DEPENDENCIES[sender])
+
+
+def invalidate_recipe_relations(sender, **kwargs):
+    """Сброс кэша рецептов при изменении тегов или ингредиентов."""
+    if kwargs['action'].startswith('post_'):
+        bump_version('recipes')
+
+
+def invalidate_recipe_carts(sender, instance, **kwargs):
+    """Сброс списков покупок при очистке ингредиентов рецепта."""
+    if kwargs['action'] == 'post_clear':
+        if kwargs['reverse']:
+            bump_recipe_carts(*kwargs['pk_set'] or ())
+        else:
+            bump_recipe_carts(instance.pk)
+
+
+def invalidate_cart(sender, instance, **kwargs):
+    """Сброс списка покупок пользователя при изменении корзины."""
+    bump_cart_version(instance.user_id)
+
+
+def touch_recipe(sender, instance, **kwargs):
+    """Обновление updated_at рецепта при изменении его ингредиентов."""
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        updated_at=timezone.now()
+    )
+
+
+def remember_cart_ingredients(sender, instance, **kwargs):
+    """Запоминание ингредиентов рецепта до удаления его из корзины."""
+    instance._total_ingredient_ids = list(
+        AmountIngredient.objects.filter(
+            recipe_id=instance.recipe_id
+        ).values_list('ingredient_id', flat=True)
+    )
+
+
+def update_cart_totals(sender, instance, **kwargs):
+    """Пересчёт итогов пользователя при изменении корзины."""
+    ingredient_ids = getattr(instance, '_total_ingredient_ids', None)
+    if ingredient_ids is None:
+        ingredient_ids = AmountIngredient.objects.filter(
+            recipe_id=instance.recipe_id
+        ).values_list('ingredient_id', flat=True)
+    refresh_shopping_totals(ingredient_ids, user_ids=[instance.user_id])
+
+
+def remember_amount_ingredient(sender, instance, **kwargs):
+    """Запоминание прежних рецепта и ингредиента изменяемой строки."""
+    instance._previous_recipe_ingredient = None
+    if instance.pk is not None:
+        instance._previous_recipe_ingredient = (
+            AmountIngredient.objects.filter(pk=instance.pk)
+            .values_list('recipe_id', 'ingredient_id')
+            .first()
+        )
+
+
+def update_recipe_totals(sender, instance, **kwargs):
+    """Пересчёт итогов и сброс списков покупок по изменённому рецепту."""
+    action = kwargs.get('action')
+    if action is None:
+        recipe_ingredients_changed(
+            instance.recipe_id, [instance.ingredient_id]
+        )
+        previous = getattr(instance, '_previous_recipe_ingredient', None)
+        if previous and previous != (
+            instance.recipe_id, instance.ingredient_id
+        ):
+            recipe_ingredients_changed(previous[0], [previous[1]])
+    elif action in ('post_add', 'post_remove'):
+        if kwargs['reverse']:
+            for recipe_id in kwargs['pk_set']:
+                recipe_ingredients_changed(recipe_id, [instance.pk])
+        else:
+            recipe_ingredients_changed(instance.pk, kwargs['pk_set'])
+
+
+def fan_out_new_recipe(sender, instance, created, **kwargs):
+    """Рассылка нового рецепта в ленты после фиксации транзакции."""
+    if created:
+        transaction.on_commit(lambda: fan_out_recipe(instance.pk))
+
+
+def update_feed(sender, instance, **kwargs):
+    """Обновление ленты подписчика при подписке и отписке."""
+    if kwargs.get('created', False):
+        follow(instance.user_id, [instance.author_id])
+    elif 'created' not in kwargs:
+        unfollow(instance.user_id, [instance.author_id])
+
+
+def invalidate_user_relations(sender, instance, **kwargs):
+    """Сброс версии связей пользователя."""
+    bump_user_version(instance.user_id)
+
+
+def remember_new_image(sender, instance, **kwargs):
+    """Отметка о новом файле изображения до его сохранения."""
+    file = getattr(instance, IMAGE_FIELDS[sender])
+    instance._new_image = bool(file) and not file._committed
+
+
+def create_image_variants(sender, instance, **kwargs):
+    """Создание уменьшенных вариантов только что загруженного файла."""
+    if not getattr(instance, '_new_image', False):
+        return
+    instance._new_image = False
+    file = getattr(instance, IMAGE_FIELDS[sender])
+    try:
+        make_variants(file)
+    except Exception:
+        logger.exception('Не удалось создать варианты %s', file.name)
+
+
+def invalidate_token(sender, instance, **kwargs):
+    """Удаление токена из кэша аутентификации при выходе."""
+    invalidate_tokens(instance.key)
+
+
+def invalidate_user_auth(sender, instance, **kwargs):
+    """Сброс кэша токенов пользователя при изменении его данных.
+
+    Сюда попадают смена пароля и деактивация, а также изменения профиля,
+    чтобы request.user не отдавал устаревшие поля.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_user_tokens(instance.pk)
+
+
+for model in CACHE_DEPENDENCIES:
+    post_save.connect(
+        invalidate_response_cache,
+        sender=model,
+        dispatch_uid=f'response_cache_save_{model.__name__}',
+    )
+    post_delete.connect(
+        invalidate_response_cache,
+        sender=model,
+        dispatch_uid=f'response_cache_delete_{model.__name__}',
+    )
+
+for through in (Recipe.tags.through, Recipe.ingredients.through):
+    m2m_changed.connect(
+        invalidate_recipe_relations,
+        sender=through,
+        dispatch_uid=f'response_cache_m2m_{through.__name__}',
+    )
+
+for model in USER_RELATIONS:
+    post_save.connect(
+        invalidate_user_relations,
+        sender=model,
+        dispatch_uid=f'user_relations_save_{model.__name__}',
+    )
+    post_delete.connect(
+        invalidate_user_relations,
+        sender=model,
+        dispatch_uid=f'user_relations_delete_{model.__name__}',
+    )
+
+post_save.connect(
+    touch_recipe,
+    sender=AmountIngredient,
+    dispatch_uid='touch_recipe_save',
+)
+post_delete.connect(
+    touch_recipe,
+    sender=AmountIngredient,
+    dispatch_uid='touch_recipe_delete',
+)
+
+post_save.connect(
+    invalidate_cart,
+    sender=ShoppingCart,
+    dispatch_uid='cart_save',
+)
+post_delete.connect(
+    invalidate_cart,
+    sender=ShoppingCart,
+    dispatch_uid='cart_delete',
+)
+
+m2m_changed.connect(
+    invalidate_recipe_carts,
+    sender=Recipe.ingredients.through,
+    dispatch_uid='recipe_carts_m2m',
+)
+
+pre_delete.connect(
+    remember_cart_ingredients,
+    sender=ShoppingCart,
+    dispatch_uid='shopping_totals_cart_pre_delete',
+)
+post_save.connect(
+    update_cart_totals,
+    sender=ShoppingCart,
+    dispatch_uid='shopping_totals_cart_save',
+)
+post_delete.connect(
+    update_cart_totals,
+    sender=ShoppingCart,
+    dispatch_uid='shopping_totals_cart_delete',
+)
+pre_save.connect(
+    remember_amount_ingredient,
+    sender=AmountIngredient,
+    dispatch_uid='shopping_totals_amount_pre_save',
+)
+post_save.connect(
+    update_recipe_totals,
+    sender=AmountIngredient,
+    dispatch_uid='shopping_totals_amount_save',
+)
+post_delete.connect(
+    update_recipe_totals,
+    sender=AmountIngredient,
+    dispatch_uid='shopping_totals_amount_delete',
+)
+m2m_changed.connect(
+    update_recipe_totals,
+    sender=Recipe.ingredients.through,
+    dispatch_uid='shopping_totals_m2m',
+)
+
+post_save.connect(
+    fan_out_new_recipe,
+    sender=Recipe,
+    dispatch_uid='feed_recipe_save',
+)
+post_save.connect(
+    update_feed,
+    sender=Subscriptions,
+    dispatch_uid='feed_subscription_save',
+)
+post_delete.connect(
+    update_feed,
+    sender=Subscriptions,
+    dispatch_uid='feed_subscription_delete',
+)
+
+post_delete.connect(
+    invalidate_token,
+    sender=Token,
+    dispatch_uid='token_cache_token_delete',
+)
+post_save.connect(
+    invalidate_user_auth,
+    sender=User,
+    dispatch_uid='token_cache_user_save',
+)
+
+for model in IMAGE_FIELDS:
+    pre_save.connect(
+        remember_new_image,
+        sender=model,
+        dispatch_uid=f'image_variants_pre_save_{model.__name__}',
+    )
+    post_save.connect(
+        create_image_variants,
+        sender=model,
+        dispatch_uid=f'image_variants_save_{model.__name__}',
+    )
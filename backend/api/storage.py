@@ -0,0 +1,85 @@
+"""Хранилище медиафайлов с именами по содержимому.
+
+Имя файла — SHA-256 содержимого внутри каталога upload_to, например
+recipes/images/3f/3f2a...e1.png. Одинаковые загрузки разделяют один
+файл, а содержимое по URL никогда не меняется, поэтому nginx отдаёт
+такие файлы с Cache-Control: immutable. Старые файлы при замене не
+удаляются сразу: их убирает команда sweep_media, когда на файл больше
+не ссылается ни одна запись. Производные файлы (варианты изображений)
+пишутся под своими именами через save_derived.
+"""
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def get_content_hash(content):
+    """SHA-256 содержимого файла, прочитанного частями."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, сохраняющий файлы под хешем содержимого."""
+
+    def get_hashed_name(self, name, digest):
+        """Имя файла по каталогу исходного имени и хешу."""
+        directory, filename = posixpath.split(name)
+        extension = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(
+            directory, digest[:2], f'{digest}{extension}'
+        )
+
+    def save(self, name, content, max_length=None):
+        """Сохранение под хешем; уже существующий файл не перезаписывается."""
+        if name is None:
+            name = content.name
+        name = self.get_hashed_name(name, get_content_hash(content))
+        if self.exists(name):
+            # Свежая отметка времени защищает файл от sweep_media, пока
+            # запись, которая на него ссылается, ещё не сохранена.
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+    def save_derived(self, name, content):
+        """Запись файла под заданным именем с заменой прежнего.
+
+        Имя не хешируется и не меняется при совпадении. Содержимое
+        пишется во временный файл того же каталога и подменяет прежний
+        через os.replace, поэтому по имени всегда доступен целый файл:
+        старый до замены, новый после.
+        """
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+            if self.directory_permissions_mode is not None:
+                os.chmod(directory, self.directory_permissions_mode)
+        temporary = os.path.join(directory, f'.{uuid.uuid4().hex}.tmp')
+        try:
+            fd = os.open(
+                temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666
+            )
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporary, self.file_permissions_mode)
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return name
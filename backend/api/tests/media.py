@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+
+from django.test import override_settings
+
+
+class TemporaryMediaMixin:
+    """Временный MEDIA_ROOT на время тестов класса.
+
+    Каталог создаётся в setUpClass и удаляется в tearDownClass; тесты,
+    которым нужен пустой каталог, очищают его через clear_media.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        """Временный каталог медиафайлов."""
+        cls.media_root = tempfile.mkdtemp()
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls.media_override.disable()
+            shutil.rmtree(cls.media_root, ignore_errors=True)
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        """Удаление временного каталога."""
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def clear_media(cls):
+        """Удаление всех файлов из временного каталога."""
+        for name in os.listdir(cls.media_root):
+            shutil.rmtree(
+                os.path.join(cls.media_root, name), ignore_errors=True
+            )
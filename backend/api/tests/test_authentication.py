@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import TokenCache, token_cache
+from users.models import MyUser
+
+
+class TokenCacheInvalidationTest(TestCase):
+    """Кэш токенов сбрасывается сразу при выходе и изменении пользователя."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Пользователь с токеном."""
+        cls.user = MyUser.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+        cls.token = Token.objects.create(user=cls.user)
+
+    def setUp(self):
+        """Пустой кэш и клиент с токеном, уже попавшим в кэш."""
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(self.me().status_code, 200)
+        self.assertIn(self.token.key, token_cache.entries)
+
+    def me(self):
+        """Ответ профиля текущего пользователя."""
+        return self.client.get('/api/users/me/')
+
+    def test_repeated_request_hits_cache(self):
+        """Повторный запрос берёт пользователя из кэша."""
+        self.assertEqual(self.me().status_code, 200)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+
+    def test_logout(self):
+        """После выхода токен сразу перестаёт действовать."""
+        response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertNotIn(self.token.key, token_cache.entries)
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_password_change(self):
+        """Смена пароля удаляет пользователя из кэша."""
+        response = self.client.post('/api/users/set_password/', {
+            'current_password': 'password-123',
+            'new_password': 'new-password-456',
+        })
+        self.assertEqual(response.status_code, 204)
+        self.assertNotIn(self.token.key, token_cache.entries)
+        self.assertEqual(self.me().status_code, 200)
+        user, _ = token_cache.get(self.token.key)
+        self.assertTrue(user.check_password('new-password-456'))
+
+    def test_deactivation(self):
+        """Деактивированный пользователь сразу теряет доступ."""
+        self.user.is_active = False
+        self.user.save()
+        self.assertNotIn(self.token.key, token_cache.entries)
+        self.assertEqual(self.me().status_code, 401)
+
+
+class TokenCacheTimeoutTest(SimpleTestCase):
+    """Записи кэша токенов истекают через timeout секунд."""
+
+    def test_entry_expires(self):
+        """Запись доступна до истечения срока и пропадает после."""
+        cache = TokenCache(size=10, timeout=60)
+        with mock.patch('api.authentication.time.monotonic') as monotonic:
+            monotonic.return_value = 1000.0
+            cache.set('key', ('user', 'token'))
+            monotonic.return_value = 1059.0
+            self.assertEqual(cache.get('key'), ('user', 'token'))
+            monotonic.return_value = 1060.0
+            self.assertIsNone(cache.get('key'))
+        self.assertNotIn('key', cache.entries)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_size_limit_evicts_oldest(self):
+        """При переполнении вытесняется давно не использованная запись."""
+        cache = TokenCache(size=2, timeout=60)
+        cache.set('first', 1)
+        cache.set('second', 2)
+        cache.get('first')
+        cache.set('third', 3)
+        self.assertEqual(list(cache.entries), ['first', 'third'])
+        self.assertEqual(cache.stats()['evictions'], 1)
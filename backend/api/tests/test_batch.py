@@ -0,0 +1,221 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.constants import BATCH_MAX_SIZE
+from api.shopping import calculate_totals
+from recipes.models import (
+    AmountIngredient,
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    ShoppingTotal,
+)
+from users.models import MyUser, Subscriptions
+
+
+class BatchRelationTest(TestCase):
+    """Результаты пакетных операций по каждому id."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Пользователь, автор и три рецепта с ингредиентом."""
+        cls.user, cls.author = [
+            MyUser.objects.create_user(
+                email=f'{username}@example.com',
+                username=username,
+                first_name='Имя',
+                last_name='Фамилия',
+                password='password-123',
+            )
+            for username in ('reader', 'author')
+        ]
+        cls.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                name=f'Рецепт {index}', author=cls.author, text='Описание',
+                cooking_time=5,
+            )
+            for index in range(3)
+        ]
+        AmountIngredient.objects.bulk_create(
+            AmountIngredient(
+                recipe=recipe, ingredient=cls.ingredient, amount=2
+            )
+            for recipe in cls.recipes
+        )
+        cls.missing = max(recipe.pk for recipe in cls.recipes) + 100
+
+    def setUp(self):
+        """Клиент пользователя."""
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def statuses(self, response):
+        """Статусы результатов по id."""
+        self.assertEqual(response.status_code, 200, response.data)
+        return {
+            result['id']: result['status']
+            for result in response.data['results']
+        }
+
+    def test_post_reports_created_exists_not_found(self):
+        """Созданные, существующие и несуществующие id различаются."""
+        first, second, third = self.recipes
+        Favorite.objects.create(user=self.user, recipe=first)
+        response = self.client.post(
+            '/api/recipes/favorite/batch/',
+            {'ids': [first.pk, second.pk, self.missing, third.pk]},
+            format='json',
+        )
+        self.assertEqual(self.statuses(response), {
+            first.pk: 'exists',
+            second.pk: 'created',
+            self.missing: 'not_found',
+            third.pk: 'created',
+        })
+        self.assertEqual(
+            [result['id'] for result in response.data['results']],
+            [first.pk, second.pk, self.missing, third.pk],
+        )
+        self.assertEqual(
+            set(Favorite.objects.filter(user=self.user).values_list(
+                'recipe_id', flat=True
+            )),
+            {recipe.pk for recipe in self.recipes},
+        )
+
+    def test_repeated_post_creates_nothing(self):
+        """Повторный запрос сообщает exists для всех id."""
+        ids = [recipe.pk for recipe in self.recipes]
+        self.client.post(
+            '/api/recipes/favorite/batch/', {'ids': ids}, format='json'
+        )
+        response = self.client.post(
+            '/api/recipes/favorite/batch/', {'ids': ids}, format='json'
+        )
+        self.assertEqual(
+            set(self.statuses(response).values()), {'exists'}
+        )
+
+    def test_delete_reports_deleted_and_not_found(self):
+        """Удалённые id отличаются от отсутствующих связей."""
+        first, second, _ = self.recipes
+        Favorite.objects.create(user=self.user, recipe=first)
+        response = self.client.delete(
+            '/api/recipes/favorite/batch/',
+            {'ids': [first.pk, second.pk, self.missing]},
+            format='json',
+        )
+        self.assertEqual(self.statuses(response), {
+            first.pk: 'deleted',
+            second.pk: 'not_found',
+            self.missing: 'not_found',
+        })
+        self.assertFalse(Favorite.objects.filter(user=self.user).exists())
+
+    def test_cart_totals_follow_batch_results(self):
+        """Итоги корзины учитывают только действительно изменённые связи."""
+        first, second, third = self.recipes
+        ShoppingCart.objects.create(user=self.user, recipe=first)
+        self.client.post(
+            '/api/recipes/shopping_cart/batch/',
+            {'ids': [first.pk, second.pk, third.pk]},
+            format='json',
+        )
+        self.client.delete(
+            f'/api/recipes/shopping_cart/batch/?ids={second.pk},'
+            f'{self.missing}'
+        )
+        total = ShoppingTotal.objects.get(
+            user=self.user, ingredient=self.ingredient
+        ).total
+        self.assertEqual(total, 4)
+        self.assertEqual(
+            [row['total'] for row in calculate_totals([self.user.pk])], [4]
+        )
+
+    def test_invalid_ids_are_rejected(self):
+        """Пустой, слишком длинный и нечисловой списки отклоняются."""
+        for url in (
+            '/api/recipes/favorite/batch/',
+            '/api/recipes/shopping_cart/batch/',
+            '/api/users/subscribe/batch/',
+        ):
+            for ids in (
+                [], list(range(1, BATCH_MAX_SIZE + 2)), ['a'], [0],
+            ):
+                with self.subTest(url=url, size=len(ids)):
+                    response = self.client.post(
+                        url, {'ids': ids}, format='json'
+                    )
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('ids', response.data)
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_limit_is_inclusive(self):
+        """Список длиной BATCH_MAX_SIZE принимается."""
+        ids = [recipe.pk for recipe in self.recipes]
+        ids += [self.missing + index for index in range(
+            BATCH_MAX_SIZE - len(ids)
+        )]
+        response = self.client.post(
+            '/api/recipes/favorite/batch/', {'ids': ids}, format='json'
+        )
+        statuses = self.statuses(response)
+        self.assertEqual(len(statuses), BATCH_MAX_SIZE)
+        self.assertEqual(
+            list(statuses.values()).count('created'), len(self.recipes)
+        )
+
+    def test_repeated_ids_are_reported_once(self):
+        """Повторы id в запросе схлопываются с сохранением порядка."""
+        first, second, _ = self.recipes
+        response = self.client.post(
+            '/api/recipes/shopping_cart/batch/',
+            {'ids': [second.pk, first.pk, second.pk]},
+            format='json',
+        )
+        self.assertEqual(
+            [result['id'] for result in response.data['results']],
+            [second.pk, first.pk],
+        )
+        self.assertEqual(
+            set(self.statuses(response).values()), {'created'}
+        )
+
+    def test_subscribe_mixed_results(self):
+        """Подписка на себя — invalid, на автора — created."""
+        missing = max(self.user.pk, self.author.pk) + 100
+        response = self.client.post(
+            '/api/users/subscribe/batch/',
+            {'ids': [self.user.pk, self.author.pk, missing]},
+            format='json',
+        )
+        self.assertEqual(self.statuses(response), {
+            self.user.pk: 'invalid',
+            self.author.pk: 'created',
+            missing: 'not_found',
+        })
+        self.assertEqual(
+            list(Subscriptions.objects.filter(user=self.user).values_list(
+                'author_id', flat=True
+            )),
+            [self.author.pk],
+        )
+
+        response = self.client.post(
+            '/api/users/subscribe/batch/',
+            {'ids': [self.author.pk]},
+            format='json',
+        )
+        self.assertEqual(self.statuses(response), {self.author.pk: 'exists'})
+        response = self.client.delete(
+            f'/api/users/subscribe/batch/?ids={self.author.pk},{self.user.pk}'
+        )
+        self.assertEqual(self.statuses(response), {
+            self.author.pk: 'deleted',
+            self.user.pk: 'not_found',
+        })
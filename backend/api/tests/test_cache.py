@@ -0,0 +1,47 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.cache import get_user_version, get_version
+from recipes.models import Recipe, Tag
+from users.models import MyUser
+
+
+class VersionBumpTest(TestCase):
+    """Версии кэша увеличиваются только после фиксации транзакции."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Пользователь и рецепт."""
+        cls.user = MyUser.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+        cls.recipe = Recipe.objects.create(
+            name='Рецепт', author=cls.user, text='Описание', cooking_time=5,
+        )
+
+    def test_model_change_bumps_after_commit(self):
+        """Сигнал модели откладывает смену версии до фиксации."""
+        before = {name: get_version(name) for name in ('recipes', 'tags')}
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.create(name='Тег', color='#000000', slug='tag')
+            for name, version in before.items():
+                self.assertEqual(get_version(name), version)
+        for name, version in before.items():
+            self.assertGreater(get_version(name), version)
+
+    def test_relation_change_bumps_after_commit(self):
+        """Добавление в избранное меняет версию пользователя после фиксации."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        before = get_user_version(self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(get_user_version(self.user.pk), before)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_user_version(self.user.pk), before)
@@ -0,0 +1,46 @@
+from django.test import TestCase, override_settings
+
+from api import catalog
+from api.cache import bump_version
+
+
+class CatalogBlobTest(TestCase):
+    """Пересборка блоба справочника по версии и сроку жизни."""
+
+    namespace = 'test-catalog'
+
+    def setUp(self):
+        """Пустой набор блобов и счётчик сборок."""
+        catalog._blobs.pop(self.namespace, None)
+        self.builds = 0
+
+    def build(self):
+        """Сборка блоба с номером сборки в теле."""
+        self.builds += 1
+        return f'[{self.builds}]'.encode()
+
+    @override_settings(CATALOG_BLOB_TTL=60)
+    def test_blob_is_reused_within_ttl(self):
+        """Блоб той же версии в пределах срока не пересобирается."""
+        first = catalog.get_catalog_blob(self.namespace, self.build)
+        second = catalog.get_catalog_blob(self.namespace, self.build)
+        self.assertIs(first, second)
+        self.assertEqual(self.builds, 1)
+
+    @override_settings(CATALOG_BLOB_TTL=60)
+    def test_version_bump_rebuilds_blob(self):
+        """Смена версии пространства имён пересобирает блоб."""
+        first = catalog.get_catalog_blob(self.namespace, self.build)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_version(self.namespace)
+        second = catalog.get_catalog_blob(self.namespace, self.build)
+        self.assertEqual(self.builds, 2)
+        self.assertNotEqual(first.etag, second.etag)
+
+    @override_settings(CATALOG_BLOB_TTL=0)
+    def test_expired_blob_is_rebuilt_without_version_bump(self):
+        """Изменение из другого процесса видно после истечения срока."""
+        catalog.get_catalog_blob(self.namespace, self.build)
+        blob = catalog.get_catalog_blob(self.namespace, self.build)
+        self.assertEqual(self.builds, 2)
+        self.assertEqual(blob.body, b'[2]')
@@ -0,0 +1,108 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import FeedEntry, Recipe, Tag
+from users.models import MyUser, Subscriptions
+
+
+class FeedTest(TestCase):
+    """Лента из записей FeedEntry и рецептов авторов feed_on_read."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Читатель, обычный автор, популярный автор и посторонний."""
+        cls.reader, cls.author, cls.popular, cls.stranger = [
+            MyUser.objects.create_user(
+                email=f'{username}@example.com',
+                username=username,
+                first_name='Имя',
+                last_name='Фамилия',
+                password='password-123',
+            )
+            for username in ('reader', 'author', 'popular', 'stranger')
+        ]
+        cls.tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        for index in range(12):
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {index}',
+                author=(cls.author, cls.popular, cls.stranger)[index % 3],
+                text='Описание',
+                cooking_time=5,
+            )
+            if index % 2:
+                recipe.tags.add(cls.tag)
+        for author in (cls.author, cls.popular):
+            Subscriptions.objects.create(user=cls.reader, author=author)
+        # Рецепты популярного автора уже есть в ленте, но новые читаются
+        # при запросе: оба источника возвращают одни и те же рецепты.
+        MyUser.objects.filter(pk=cls.popular.pk).update(feed_on_read=True)
+        cls.late = Recipe.objects.create(
+            name='Новый рецепт', author=cls.popular, text='Описание',
+            cooking_time=5,
+        )
+
+    def setUp(self):
+        """Клиент читателя."""
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def expected(self, **filters):
+        """Рецепты подписок в порядке ленты."""
+        return list(
+            Recipe.objects.filter(
+                author__in=[self.author, self.popular], **filters
+            ).order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+
+    def walk(self, url):
+        """Идентификаторы рецептов всех страниц и последний ответ."""
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(recipe['id'] for recipe in response.data['results'])
+            url = response.data['next']
+        return ids, response
+
+    def test_pages_merge_both_sources(self):
+        """Страницы сливают источники без повторов и пропусков."""
+        self.assertFalse(FeedEntry.objects.filter(recipe=self.late).exists())
+        ids, last = self.walk('/api/recipes/feed/?limit=3')
+        self.assertEqual(ids, self.expected())
+        self.assertEqual(ids[0], self.late.pk)
+
+        ids = []
+        url = last.data['previous']
+        while url:
+            response = self.client.get(url)
+            ids[:0] = [recipe['id'] for recipe in response.data['results']]
+            url = response.data['previous']
+        expected = self.expected()
+        self.assertEqual(ids, expected[:len(expected) - len(
+            last.data['results']
+        )])
+
+    def test_filters_restrict_sources(self):
+        """Фильтры рецептов применяются к обоим источникам."""
+        ids, _ = self.walk(f'/api/recipes/feed/?limit=2&tags={self.tag.slug}')
+        self.assertEqual(ids, self.expected(tags=self.tag))
+
+    def test_page_is_read_from_feed_index(self):
+        """Страница выбирается из FeedEntry, а не обходом рецептов."""
+        table = FeedEntry._meta.db_table
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/recipes/feed/?limit=3')
+        entry_queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(f'SELECT "{table}".')
+        ]
+        self.assertEqual(len(entry_queries), 1)
+        self.assertIn('ORDER BY', entry_queries[0])
+        self.assertIn('LIMIT 4', entry_queries[0])
+        recipe_queries = [
+            query['sql'] for query in context.captured_queries
+            if table in query['sql'] and query['sql'] not in entry_queries
+        ]
+        self.assertEqual(recipe_queries, [])
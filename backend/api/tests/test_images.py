@@ -0,0 +1,79 @@
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase
+from PIL import Image
+
+from api import images
+from api.images import get_variant_name, get_variant_urls, make_variants
+from api.tests.media import TemporaryMediaMixin
+from recipes.models import Recipe
+
+
+def make_png():
+    """Небольшое изображение PNG."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), 'red').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class ImageVariantsTest(TemporaryMediaMixin, SimpleTestCase):
+    """Запись вариантов и их URL в ответах."""
+
+    def setUp(self):
+        """Оригинал изображения и пустой кэш найденных вариантов."""
+        self.addCleanup(self.clear_media)
+        images._existing_variants.clear()
+        name = default_storage.save(
+            'recipes/images/photo.png', ContentFile(make_png())
+        )
+        self.file = Recipe(image=name).image
+
+    def test_save_derived_replaces_in_place(self):
+        """save_derived пишет под заданным именем и заменяет файл целиком."""
+        name = 'recipes/images/variants/derived.txt'
+        for content in (b'first', b'second'):
+            self.assertEqual(
+                default_storage.save_derived(name, ContentFile(content)), name
+            )
+            with default_storage.open(name, 'rb') as file:
+                self.assertEqual(file.read(), content)
+        directory = os.path.dirname(default_storage.path(name))
+        self.assertEqual(os.listdir(directory), ['derived.txt'])
+
+    def test_original_until_variants_exist(self):
+        """До создания вариантов вместо них отдаётся оригинал."""
+        urls = get_variant_urls(self.file)
+        original = default_storage.url(self.file.name)
+        self.assertEqual(urls, {
+            'thumb': {'png': original},
+            'card': {'png': original},
+        })
+
+    def test_only_created_formats_are_advertised(self):
+        """Отдаются только форматы, файлы которых есть в хранилище."""
+        names = make_variants(self.file)
+        self.assertTrue(all(default_storage.exists(name) for name in names))
+        urls = get_variant_urls(self.file)
+        self.assertEqual(
+            set(urls['thumb']), set(images.get_variant_formats())
+        )
+        images._existing_variants.clear()
+        webp = get_variant_name(self.file.name, 'card', 'webp')
+        if default_storage.exists(webp):
+            default_storage.delete(webp)
+        urls = get_variant_urls(self.file)
+        self.assertEqual(set(urls['card']), {'jpeg'})
+        self.assertEqual(
+            urls['card']['jpeg'],
+            default_storage.url(
+                get_variant_name(self.file.name, 'card', 'jpeg')
+            ),
+        )
+
+    def test_make_variants_overwrites_existing(self):
+        """Повторное создание сохраняет имена вариантов."""
+        first = make_variants(self.file)
+        self.assertEqual(make_variants(self.file), first)
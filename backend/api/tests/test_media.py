@@ -0,0 +1,137 @@
+import hashlib
+import io
+import os
+import time
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from PIL import Image
+
+from api.images import get_variant_names
+from api.storage import ContentAddressedStorage
+from api.tests.media import TemporaryMediaMixin
+from recipes.models import Recipe
+from users.models import MyUser
+
+OLD = time.time() - 24 * 60 * 60
+
+
+def make_png(color):
+    """Небольшое изображение PNG заданного цвета."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), color).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class ContentAddressedStorageTest(TemporaryMediaMixin, SimpleTestCase):
+    """Имена файлов по SHA-256 содержимого."""
+
+    def setUp(self):
+        """Пустой каталог медиафайлов после теста."""
+        self.addCleanup(self.clear_media)
+
+    def test_hashed_name(self):
+        """Файл сохраняется под хешем в каталоге исходного имени."""
+        content = make_png('red')
+        digest = hashlib.sha256(content).hexdigest()
+        name = default_storage.save(
+            'recipes/images/Photo.PNG', ContentFile(content)
+        )
+        self.assertIsInstance(default_storage, ContentAddressedStorage)
+        self.assertEqual(name, f'recipes/images/{digest[:2]}/{digest}.png')
+        with default_storage.open(name, 'rb') as file:
+            self.assertEqual(file.read(), content)
+
+    def test_same_content_is_stored_once(self):
+        """Одинаковое содержимое разделяет один файл с новой отметкой."""
+        content = make_png('red')
+        first = default_storage.save(
+            'recipes/images/a.png', ContentFile(content)
+        )
+        os.utime(default_storage.path(first), (OLD, OLD))
+        second = default_storage.save(
+            'recipes/images/b.png', ContentFile(content)
+        )
+        self.assertEqual(first, second)
+        self.assertGreater(
+            os.path.getmtime(default_storage.path(first)), OLD + 60
+        )
+        other = default_storage.save(
+            'recipes/images/a.png', ContentFile(make_png('blue'))
+        )
+        self.assertNotEqual(other, first)
+
+
+class SweepMediaTest(TemporaryMediaMixin, TestCase):
+    """Команда sweep_media удаляет только старые файлы без ссылок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Автор рецептов."""
+        cls.author = MyUser.objects.create_user(
+            email='author@example.com',
+            username='author',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+
+    def setUp(self):
+        """Пустой каталог медиафайлов после теста."""
+        self.addCleanup(self.clear_media)
+
+    def create_recipe(self, color):
+        """Рецепт с изображением и его вариантами."""
+        return Recipe.objects.create(
+            name='Рецепт', author=self.author, text='Описание',
+            cooking_time=5,
+            image=ContentFile(make_png(color), name='photo.png'),
+        )
+
+    def age(self, *names):
+        """Отметка времени файлов в прошлом."""
+        for name in names:
+            os.utime(default_storage.path(name), (OLD, OLD))
+
+    def sweep(self, *args):
+        """Вывод команды sweep_media."""
+        stdout = io.StringIO()
+        call_command('sweep_media', '--min-age', '3600', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def existing(self, *names):
+        """Имена из names, файлы которых есть в хранилище."""
+        return [name for name in names if default_storage.exists(name)]
+
+    def test_sweep(self):
+        """Оригиналы со ссылками и новые файлы остаются, сироты удаляются."""
+        kept = self.create_recipe('red')
+        kept_files = [kept.image.name, *get_variant_names(kept.image.name)]
+        orphan = self.create_recipe('green')
+        orphan_files = [
+            orphan.image.name, *get_variant_names(orphan.image.name)
+        ]
+        Recipe.objects.filter(pk=orphan.pk).update(image=kept.image.name)
+        recent = self.create_recipe('blue')
+        recent_files = [
+            recent.image.name, *get_variant_names(recent.image.name)
+        ]
+        recent.delete()
+        self.age(*kept_files, *orphan_files)
+        self.assertEqual(
+            len(self.existing(*kept_files, *orphan_files, *recent_files)),
+            len(kept_files) + len(orphan_files) + len(recent_files),
+        )
+
+        output = self.sweep('--dry-run')
+        self.assertIn(f'К удалению: {len(orphan_files)}', output)
+        self.assertEqual(self.existing(*orphan_files), orphan_files)
+
+        output = self.sweep()
+        self.assertIn(f'Удалено: {len(orphan_files)}', output)
+        self.assertIn(f'пропущено новых: {len(recent_files)}', output)
+        self.assertEqual(self.existing(*kept_files), kept_files)
+        self.assertEqual(self.existing(*orphan_files), [])
+        self.assertEqual(self.existing(*recent_files), recent_files)
@@ -0,0 +1,65 @@
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.pagination import estimate_count
+from recipes.models import Recipe
+from users.models import MyUser
+
+
+class EstimateCountTest(TestCase):
+    """Проверка оценочного количества рецептов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Автор и несколько рецептов."""
+        cls.user = MyUser.objects.create_user(
+            email='author@example.com',
+            username='author',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+        Recipe.objects.bulk_create([
+            Recipe(
+                name=f'Рецепт {index}',
+                author=cls.user,
+                text='Описание',
+                cooking_time=index + 1,
+            )
+            for index in range(3)
+        ])
+
+    def test_estimate_count_returns_integer(self):
+        """Оценка — неотрицательное целое и для запроса с параметрами."""
+        for queryset in (
+            Recipe.objects.all(),
+            Recipe.objects.filter(name__startswith='Рецепт', cooking_time=2),
+        ):
+            with self.subTest(query=str(queryset.query)):
+                count = estimate_count(queryset)
+                self.assertIsInstance(count, int)
+                self.assertGreaterEqual(count, 0)
+
+    def test_estimate_count_uses_explain_on_postgresql(self):
+        """На PostgreSQL количество берётся из плана запроса."""
+        if connection.vendor != 'postgresql':
+            self.skipTest('EXPLAIN (FORMAT JSON) есть только в PostgreSQL')
+        with self.assertNumQueries(1) as context:
+            estimate_count(Recipe.objects.filter(cooking_time=2))
+        self.assertTrue(
+            context.captured_queries[0]['sql'].startswith(
+                'EXPLAIN (FORMAT JSON)'
+            )
+        )
+
+    def test_recipes_list_with_estimated_count(self):
+        """Список рецептов с ?count=estimate отвечает 200 и полем count."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for params in ({'count': 'estimate'},
+                       {'count': 'estimate', 'pagination': 'cursor'}):
+            with self.subTest(params=params):
+                response = client.get('/api/recipes/', params)
+                self.assertEqual(response.status_code, 200)
+                self.assertIsInstance(response.data['count'], int)
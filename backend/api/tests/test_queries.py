@@ -0,0 +1,111 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.cache import get_cache
+from recipes.models import (
+    AmountIngredient,
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import MyUser, Subscriptions
+
+# Запросы при промахе кэша ответов: счётчик и страница (для рецепта —
+# отметка ETag и сам рецепт), теги, ингредиенты, а для авторизованного
+# ещё авторы с is_subscribed.
+ANONYMOUS_QUERIES = 4
+AUTHENTICATED_QUERIES = 5
+
+
+class RecipeQueryCountTest(TestCase):
+    """Число запросов к базе для списка и рецепта не зависит от данных."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Читатель и рецепты разных авторов с тегами и ингредиентами."""
+        cls.reader = cls.create_user('reader')
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {index}', color=f'#00000{index}',
+                slug=f'tag-{index}',
+            )
+            for index in range(2)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {index}', measurement_unit='г'
+            )
+            for index in range(3)
+        ]
+        cls.add_recipes(3)
+        cls.recipe = Recipe.objects.order_by('pk').first()
+
+    @classmethod
+    def create_user(cls, username):
+        """Пользователь с именем username."""
+        return MyUser.objects.create_user(
+            email=f'{username}@example.com',
+            username=username,
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+
+    @classmethod
+    def add_recipes(cls, count):
+        """Рецепты новых авторов, отмеченные читателем."""
+        start = Recipe.objects.count()
+        for index in range(start, start + count):
+            author = cls.create_user(f'author-{index}')
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {index}', author=author, text='Описание',
+                cooking_time=5,
+            )
+            recipe.tags.set(cls.tags)
+            AmountIngredient.objects.bulk_create(
+                AmountIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=index + 1
+                )
+                for ingredient in cls.ingredients
+            )
+            Favorite.objects.create(user=cls.reader, recipe=recipe)
+            ShoppingCart.objects.create(user=cls.reader, recipe=recipe)
+            Subscriptions.objects.create(user=cls.reader, author=author)
+
+    def get(self, url, user=None, queries=0):
+        """Ответ на запрос url с проверкой числа запросов."""
+        get_cache().clear()
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        with self.assertNumQueries(queries):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_list(self):
+        """Список рецептов для гостя и пользователя."""
+        for count in (3, 6):
+            if count > Recipe.objects.count():
+                self.add_recipes(count - Recipe.objects.count())
+            with self.subTest(recipes=count):
+                response = self.get('/api/recipes/', queries=ANONYMOUS_QUERIES)
+                self.assertEqual(len(response.data['results']), count)
+                response = self.get(
+                    '/api/recipes/', self.reader, AUTHENTICATED_QUERIES
+                )
+                self.assertTrue(all(
+                    recipe['is_favorited']
+                    and recipe['author']['is_subscribed']
+                    for recipe in response.data['results']
+                ))
+
+    def test_detail(self):
+        """Рецепт для гостя и пользователя."""
+        url = f'/api/recipes/{self.recipe.pk}/'
+        response = self.get(url, queries=ANONYMOUS_QUERIES)
+        self.assertEqual(len(response.data['ingredients']), 3)
+        response = self.get(url, self.reader, AUTHENTICATED_QUERIES)
+        self.assertTrue(response.data['is_in_shopping_cart'])
@@ -0,0 +1,118 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from api.shopping import calculate_totals
+from recipes.models import (
+    AmountIngredient,
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    ShoppingTotal,
+)
+from users.models import MyUser
+
+THREADS = 16
+ROUNDS = 5
+
+
+class ConcurrentRelationTest(TransactionTestCase):
+    """Параллельное добавление и удаление одной и той же связи."""
+
+    def setUp(self):
+        """Пользователь и рецепт с ингредиентами."""
+        if connection.vendor == 'sqlite':
+            self.skipTest('SQLite не поддерживает параллельную запись')
+        self.user = MyUser.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+        self.recipe = Recipe.objects.create(
+            name='Рецепт', author=self.user, text='Описание',
+            cooking_time=5,
+        )
+        AmountIngredient.objects.bulk_create([
+            AmountIngredient(
+                recipe=self.recipe,
+                ingredient=Ingredient.objects.create(
+                    name=name, measurement_unit='г'
+                ),
+                amount=amount,
+            )
+            for name, amount in (('мука', 200), ('соль', 5))
+        ])
+
+    def request(self, barrier, method, url):
+        """Запрос из отдельного потока со своим соединением с базой."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        try:
+            barrier.wait()
+            return getattr(client, method)(url).status_code
+        finally:
+            connection.close()
+
+    def hammer(self, methods, url):
+        """Одновременный запуск запросов, статусы ответов."""
+        barrier = threading.Barrier(len(methods))
+        with ThreadPoolExecutor(max_workers=len(methods)) as executor:
+            return list(executor.map(
+                lambda method: self.request(barrier, method, url), methods
+            ))
+
+    def assert_totals_consistent(self):
+        """ShoppingTotal совпадает с суммами по рецептам корзины."""
+        expected = {
+            row['ingredient_id']: row['total']
+            for row in calculate_totals([self.user.pk])
+        }
+        actual = dict(
+            ShoppingTotal.objects.filter(user=self.user)
+            .values_list('ingredient_id', 'total')
+        )
+        self.assertEqual(actual, expected)
+
+    def check_relation(self, model, url):
+        """Добавления, смешанные запросы и удаления одной связи."""
+        relations = model.objects.filter(user=self.user, recipe=self.recipe)
+
+        statuses = self.hammer(['post'] * THREADS, url)
+        self.assertNotIn(500, statuses)
+        self.assertEqual(statuses.count(201), 1)
+        self.assertEqual(relations.count(), 1)
+        self.assert_totals_consistent()
+
+        for _ in range(ROUNDS):
+            statuses = self.hammer(['post', 'delete'] * (THREADS // 2), url)
+            self.assertNotIn(500, statuses)
+            self.assertLessEqual(relations.count(), 1)
+            self.assert_totals_consistent()
+
+        self.hammer(['post'] * THREADS, url)
+        self.assertEqual(relations.count(), 1)
+        self.assert_totals_consistent()
+
+        statuses = self.hammer(['delete'] * THREADS, url)
+        self.assertNotIn(500, statuses)
+        self.assertEqual(statuses.count(204), 1)
+        self.assertFalse(relations.exists())
+        self.assert_totals_consistent()
+
+    def test_shopping_cart(self):
+        """Корзина покупок и итоги по ингредиентам."""
+        self.check_relation(
+            ShoppingCart, f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        )
+
+    def test_favorite(self):
+        """Избранное."""
+        self.check_relation(
+            Favorite, f'/api/recipes/{self.recipe.pk}/favorite/'
+        )
@@ -0,0 +1,153 @@
+import io
+
+from django.core.files.base import ContentFile
+from django.test import TestCase
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.renderers import FastJSONRenderer
+from api.serializers import CompiledRecipeSerializer, RecipeSerializer
+from api.tests.media import TemporaryMediaMixin
+from recipes.models import (
+    AmountIngredient,
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import MyUser, Subscriptions
+
+
+def make_png():
+    """Небольшое изображение PNG."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), 'red').save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class CompiledRecipeParityTest(TemporaryMediaMixin, TestCase):
+    """Побайтовое совпадение CompiledRecipeSerializer с RecipeSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Рецепты с флагами, подписками и рецепт без автора и фото."""
+        cls.author, cls.reader = [
+            MyUser.objects.create_user(
+                email=f'{username}@example.com',
+                username=username,
+                first_name='Имя',
+                last_name='Фамилия',
+                password='password-123',
+            )
+            for username in ('author', 'reader')
+        ]
+        cls.author.avatar.save('avatar.png', ContentFile(make_png()))
+        tags = [
+            Tag.objects.create(
+                name=f'Тег «{index}»', color=f'#00000{index}',
+                slug=f'tag{index}',
+            )
+            for index in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('абрикос', 'мука ржаная', 'соль "Экстра"')
+        ]
+        cls.recipes = []
+        for index in range(4):
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {index}',
+                author=cls.author,
+                text='Описание\nв две строки',
+                cooking_time=index + 1,
+            )
+            recipe.image.save(f'recipe{index}.png', ContentFile(make_png()))
+            recipe.tags.set(tags[:index + 1])
+            AmountIngredient.objects.bulk_create([
+                AmountIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=index + 1
+                )
+                for ingredient in ingredients[:index + 1]
+            ])
+            cls.recipes.append(recipe)
+        cls.recipes.append(Recipe.objects.create(
+            name='Рецепт без автора', author=None, text='Описание',
+            cooking_time=10,
+        ))
+        Favorite.objects.create(user=cls.reader, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.reader, recipe=cls.recipes[1])
+        Subscriptions.objects.create(user=cls.reader, author=cls.author)
+
+    def make_request(self, user):
+        """Запрос к списку рецептов от имени пользователя."""
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        if user is not None:
+            request.user = user
+        return request
+
+    def get_querysets(self, user):
+        """Обычный queryset и queryset с подгруженными связями и флагами."""
+        return {
+            'plain': Recipe.objects.order_by('id'),
+            'related': Recipe.objects.with_related(user)
+            .with_user_flags(user).order_by('id'),
+        }
+
+    def render(self, renderer, serializer_class, user, data, many):
+        """Ответ сериализатора в байтах; запрос у каждого вызова свой."""
+        context = {'request': self.make_request(user)}
+        serializer = serializer_class(data, many=many, context=context)
+        return renderer.render(serializer.data)
+
+    def assert_parity(self, user, data, many):
+        """Все сериализаторы и рендереры дают одинаковые байты."""
+        expected = self.render(
+            JSONRenderer(), RecipeSerializer, user, data, many
+        )
+        for renderer in (JSONRenderer(), FastJSONRenderer()):
+            for serializer_class in (
+                RecipeSerializer, CompiledRecipeSerializer
+            ):
+                with self.subTest(
+                    renderer=type(renderer).__name__,
+                    serializer=serializer_class.__name__,
+                ):
+                    self.assertEqual(
+                        self.render(
+                            renderer, serializer_class, user, data, many
+                        ),
+                        expected,
+                    )
+
+    def test_list_parity(self):
+        """Списки рецептов для анонима и авторизованного пользователя."""
+        for user in (None, self.reader, self.author):
+            for name, queryset in self.get_querysets(user).items():
+                with self.subTest(user=str(user), queryset=name):
+                    self.assert_parity(user, list(queryset), many=True)
+
+    def test_detail_parity(self):
+        """Отдельные рецепты, включая рецепт без автора и изображения."""
+        for user in (None, self.reader):
+            for name, queryset in self.get_querysets(user).items():
+                for recipe in queryset:
+                    with self.subTest(
+                        user=str(user), queryset=name, recipe=recipe.pk
+                    ):
+                        self.assert_parity(user, recipe, many=False)
+
+    def test_flags_are_rendered(self):
+        """Флаги читателя попадают в ответ, а не только совпадают."""
+        data = CompiledRecipeSerializer(
+            self.get_querysets(self.reader)['plain'],
+            many=True,
+            context={'request': self.make_request(self.reader)},
+        ).data
+        self.assertTrue(data[0]['is_favorited'])
+        self.assertTrue(data[1]['is_in_shopping_cart'])
+        self.assertTrue(data[0]['author']['is_subscribed'])
+        self.assertIsNone(data[-1]['author'])
+        self.assertIsNone(data[-1]['image'])
@@ -0,0 +1,47 @@
+from django.test import TestCase, override_settings
+
+from api import search
+from recipes.models import Ingredient
+
+
+class IngredientIndexTest(TestCase):
+    """Поиск ингредиентов по индексу в памяти процесса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Ингредиенты с общими префиксами и подстроками."""
+        for name in ('сахар', 'сахарная пудра', 'ванильный сахар', 'соль'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+
+    def setUp(self):
+        """Индекс строится заново в каждом тесте."""
+        search._index = None
+
+    def names(self, query, limit=None):
+        """Названия найденных ингредиентов."""
+        return [
+            row['name']
+            for row in search.get_ingredient_index().search(query, limit)
+        ]
+
+    def test_prefix_matches_come_first(self):
+        """Сначала совпадения по префиксу, затем по подстроке."""
+        self.assertEqual(
+            self.names('Сахар'),
+            ['сахар', 'сахарная пудра', 'ванильный сахар'],
+        )
+        self.assertEqual(self.names('сахар', limit=1), ['сахар'])
+
+    @override_settings(INGREDIENT_INDEX_TTL=60)
+    def test_index_is_reused_within_ttl(self):
+        """Изменение без смены версии не видно до истечения срока."""
+        self.names('соль')
+        Ingredient.objects.filter(name='соль').update(name='соль морская')
+        self.assertEqual(self.names('морская'), [])
+
+    @override_settings(INGREDIENT_INDEX_TTL=0)
+    def test_expired_index_is_rebuilt(self):
+        """Изменение из другого процесса видно после истечения срока."""
+        self.names('соль')
+        Ingredient.objects.filter(name='соль').update(name='соль морская')
+        self.assertEqual(self.names('морская'), ['соль морская'])
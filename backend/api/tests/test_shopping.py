@@ -0,0 +1,225 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.shopping import calculate_totals, get_cart_version
+from recipes.models import (
+    AmountIngredient,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    ShoppingTotal,
+    Tag,
+)
+from users.models import MyUser
+
+
+class ShoppingTotalsTest(TestCase):
+    """Итоги списков покупок совпадают с пересчётом по корзинам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Автор, два покупателя, рецепты с общими ингредиентами."""
+        cls.author, cls.buyer, cls.other = [
+            MyUser.objects.create_user(
+                email=f'{username}@example.com',
+                username=username,
+                first_name='Имя',
+                last_name='Фамилия',
+                password='password-123',
+            )
+            for username in ('author', 'buyer', 'other')
+        ]
+        cls.tag = Tag.objects.create(name='Тег', color='#000000', slug='tag')
+        cls.salt, cls.flour, cls.milk = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('соль', 'мука', 'молоко')
+        ]
+        cls.recipe = Recipe.objects.create(
+            name='Рецепт', author=cls.author, text='Описание', cooking_time=5,
+        )
+        cls.recipe.tags.add(cls.tag)
+        cls.second = Recipe.objects.create(
+            name='Второй', author=cls.author, text='Описание', cooking_time=5,
+        )
+        AmountIngredient.objects.bulk_create([
+            AmountIngredient(recipe=cls.recipe, ingredient=cls.salt, amount=5),
+            AmountIngredient(
+                recipe=cls.recipe, ingredient=cls.flour, amount=100
+            ),
+            AmountIngredient(
+                recipe=cls.second, ingredient=cls.flour, amount=200
+            ),
+        ])
+        ShoppingCart.objects.create(user=cls.buyer, recipe=cls.recipe)
+        ShoppingCart.objects.create(user=cls.buyer, recipe=cls.second)
+        ShoppingCart.objects.create(user=cls.other, recipe=cls.recipe)
+
+    def setUp(self):
+        """Клиент автора рецепта."""
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def assertTotalsMatch(self):
+        """Таблица итогов совпадает с calculate_totals."""
+        user_ids = [self.buyer.pk, self.other.pk]
+        expected = {
+            (row['recipe__cart__user_id'], row['ingredient_id']): row['total']
+            for row in calculate_totals(user_ids)
+        }
+        stored = {
+            (user_id, ingredient_id): total
+            for user_id, ingredient_id, total in ShoppingTotal.objects.filter(
+                user_id__in=user_ids
+            ).values_list('user_id', 'ingredient_id', 'total')
+        }
+        self.assertEqual(stored, expected)
+        return stored
+
+    def update_ingredients(self, ingredients):
+        """PATCH рецепта с новым набором ингредиентов."""
+        versions = {
+            user.pk: get_cart_version(user.pk)
+            for user in (self.buyer, self.other)
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.pk}/',
+                {
+                    'ingredients': [
+                        {'id': ingredient.pk, 'amount': amount}
+                        for ingredient, amount in ingredients
+                    ],
+                    'tags': [self.tag.pk],
+                },
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        for user_id, version in versions.items():
+            self.assertGreater(get_cart_version(user_id), version)
+        return self.assertTotalsMatch()
+
+    def test_add_ingredient(self):
+        """Новый ингредиент попадает в итоги всех корзин с рецептом."""
+        totals = self.update_ingredients(
+            [(self.salt, 5), (self.flour, 100), (self.milk, 300)]
+        )
+        self.assertEqual(totals[self.buyer.pk, self.milk.pk], 300)
+        self.assertEqual(totals[self.other.pk, self.milk.pk], 300)
+
+    def test_remove_ingredient(self):
+        """Удалённый ингредиент уходит из итогов, общий уменьшается."""
+        totals = self.update_ingredients([(self.salt, 5)])
+        self.assertEqual(totals[self.buyer.pk, self.flour.pk], 200)
+        self.assertNotIn((self.other.pk, self.flour.pk), totals)
+
+    def test_change_amount(self):
+        """Изменённое количество пересчитывается с учётом других рецептов."""
+        totals = self.update_ingredients([(self.salt, 7), (self.flour, 150)])
+        self.assertEqual(totals[self.buyer.pk, self.flour.pk], 350)
+        self.assertEqual(totals[self.other.pk, self.flour.pk], 150)
+        self.assertEqual(totals[self.other.pk, self.salt.pk], 7)
+
+    def test_cart_add_and_remove(self):
+        """Добавление и удаление рецепта из корзины меняют итоги."""
+        client = APIClient()
+        client.force_authenticate(self.other)
+        response = client.post(
+            f'/api/recipes/{self.second.pk}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 201)
+        totals = self.assertTotalsMatch()
+        self.assertEqual(totals[self.other.pk, self.flour.pk], 300)
+
+        response = client.delete(
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, 204)
+        totals = self.assertTotalsMatch()
+        self.assertEqual(totals[self.other.pk, self.flour.pk], 200)
+        self.assertNotIn((self.other.pk, self.salt.pk), totals)
+
+    def test_recipe_delete(self):
+        """Удаление рецепта убирает его ингредиенты из итогов корзин."""
+        response = self.client.delete(f'/api/recipes/{self.recipe.pk}/')
+        self.assertEqual(response.status_code, 204)
+        totals = self.assertTotalsMatch()
+        self.assertEqual(totals, {(self.buyer.pk, self.flour.pk): 200})
+
+    def test_summary(self):
+        """Сводка корзины строится по таблице итогов."""
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+        response = client.get('/api/recipes/shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['recipes_count'], 2)
+        self.assertEqual(response.data['items_count'], 2)
+        self.assertEqual(
+            [
+                (item['id'], item['name'], item['amount'])
+                for item in response.data['ingredients']
+            ],
+            [(self.flour.pk, 'мука', 300), (self.salt.pk, 'соль', 5)],
+        )
+
+
+class CheckShoppingTotalsTest(TestCase):
+    """Команда check_shopping_totals находит и исправляет расхождения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Пользователь с рецептом в корзине."""
+        cls.user = MyUser.objects.create_user(
+            email='buyer@example.com',
+            username='buyer',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+        cls.salt, cls.flour = [
+            Ingredient.objects.create(name=name, measurement_unit='г')
+            for name in ('соль', 'мука')
+        ]
+        recipe = Recipe.objects.create(
+            name='Рецепт', author=cls.user, text='Описание', cooking_time=5,
+        )
+        AmountIngredient.objects.create(
+            recipe=recipe, ingredient=cls.salt, amount=5
+        )
+        AmountIngredient.objects.create(
+            recipe=recipe, ingredient=cls.flour, amount=100
+        )
+        ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def check(self, *args):
+        """Вывод команды."""
+        stdout = StringIO()
+        call_command('check_shopping_totals', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def totals(self):
+        """Итоги пользователя по ингредиентам."""
+        return dict(
+            ShoppingTotal.objects.filter(user=self.user)
+            .values_list('ingredient_id', 'total')
+        )
+
+    def test_consistent_totals_pass(self):
+        """Без расхождений команда завершается успешно."""
+        self.assertIn('с расхождениями: 0', self.check())
+
+    def test_drift_is_reported_and_rebuilt(self):
+        """Расхождение обнаруживается, а --rebuild его исправляет."""
+        ShoppingTotal.objects.filter(ingredient=self.salt).update(total=50)
+        ShoppingTotal.objects.filter(ingredient=self.flour).delete()
+        with self.assertRaisesMessage(CommandError, str(self.user.pk)):
+            self.check()
+        self.assertEqual(self.totals(), {self.salt.pk: 50})
+
+        self.assertIn('Пересчитано пользователей: 1', self.check('--rebuild'))
+        self.assertEqual(
+            self.totals(), {self.salt.pk: 5, self.flour.pk: 100}
+        )
+        self.assertIn('с расхождениями: 0', self.check())
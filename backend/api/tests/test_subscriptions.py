@@ -0,0 +1,65 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import MyUser, Subscriptions
+
+
+class SubscriptionsRecipesLimitTest(TestCase):
+    """Параметр recipes_limit списка подписок."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Читатель, подписанный на автора с тремя рецептами."""
+        cls.reader, cls.author = [
+            MyUser.objects.create_user(
+                email=f'{username}@example.com',
+                username=username,
+                first_name='Имя',
+                last_name='Фамилия',
+                password='password-123',
+            )
+            for username in ('reader', 'author')
+        ]
+        for index in range(3):
+            Recipe.objects.create(
+                name=f'Рецепт {index}', author=cls.author, text='Описание',
+                cooking_time=5,
+            )
+        Subscriptions.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        """Клиент читателя."""
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def get(self, query=''):
+        """Ответ списка подписок."""
+        return self.client.get(f'/api/users/subscriptions/{query}')
+
+    def recipes(self, query=''):
+        """Число рецептов и recipes_count единственной подписки."""
+        response = self.get(query)
+        self.assertEqual(response.status_code, 200)
+        subscription, = response.data['results']
+        return len(subscription['recipes']), subscription['recipes_count']
+
+    def test_without_limit_returns_all(self):
+        """Без параметра возвращаются все рецепты."""
+        self.assertEqual(self.recipes(), (3, 3))
+
+    def test_limit(self):
+        """Положительное значение ограничивает число рецептов."""
+        self.assertEqual(self.recipes('?recipes_limit=2'), (2, 3))
+
+    def test_zero_limit_returns_no_recipes(self):
+        """recipes_limit=0 возвращает подписки без рецептов."""
+        self.assertEqual(self.recipes('?recipes_limit=0'), (0, 3))
+
+    def test_invalid_limit_is_rejected(self):
+        """Отрицательное и нецелое значения отклоняются с 400."""
+        for value in ('-1', 'abc', '1.5'):
+            with self.subTest(value=value):
+                response = self.get(f'?recipes_limit={value}')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('recipes_limit', response.data)
@@ -0,0 +1,128 @@
+import base64
+import os
+from unittest import mock
+
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile,
+    SimpleUploadedFile,
+    TemporaryUploadedFile,
+)
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from api.uploads import decode_base64_upload
+from users.models import MyUser
+
+
+def data_url(payload, content_type='image/png'):
+    """Строка data URL с base64."""
+    encoded = base64.b64encode(payload).decode()
+    return f'data:{content_type};base64,{encoded}'
+
+
+@override_settings(IMAGE_UPLOAD_MAX_SIZE=1024 * 1024)
+class DecodeBase64UploadTest(SimpleTestCase):
+    """Потоковое декодирование строки base64 в загружаемый файл."""
+
+    payload = os.urandom(1000)
+
+    def decode(self, value):
+        """Декодированное содержимое и файл загрузки."""
+        upload = decode_base64_upload(value)
+        content = upload.read()
+        upload.close()
+        return content, upload
+
+    def test_round_trip_across_chunks(self):
+        """Границы частей не портят данные, в том числе с переносами."""
+        value = data_url(self.payload)
+        header, _, encoded = value.partition(',')
+        wrapped = '\n'.join(
+            encoded[offset:offset + 7]
+            for offset in range(0, len(encoded), 7)
+        )
+        texts = (value, f'{header},{wrapped}\r\n')
+        for chunk_size in (4, 8, 12, 64 * 1024):
+            patch = mock.patch('api.uploads.BASE64_CHUNK_SIZE', chunk_size)
+            for text in texts:
+                with self.subTest(chunk_size=chunk_size, text=text[:40]):
+                    with patch:
+                        content, upload = self.decode(text)
+                    self.assertEqual(content, self.payload)
+                    self.assertEqual(upload.size, len(self.payload))
+
+    def test_padding(self):
+        """Данные с одним и двумя символами выравнивания."""
+        for payload in (b'a', b'ab', b'abc'):
+            with self.subTest(payload=payload):
+                content, _ = self.decode(data_url(payload) + '\n')
+                self.assertEqual(content, payload)
+
+    def test_memory_threshold(self):
+        """Файл до FILE_UPLOAD_MAX_MEMORY_SIZE остаётся в памяти."""
+        with override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1000):
+            _, upload = self.decode(data_url(self.payload))
+        self.assertIsInstance(upload, InMemoryUploadedFile)
+        with override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=999):
+            content, upload = self.decode(data_url(self.payload))
+        self.assertIsInstance(upload, TemporaryUploadedFile)
+        self.assertEqual(content, self.payload)
+
+    def test_invalid_data(self):
+        """Неверный формат и неверные символы отклоняются."""
+        for value in (
+            'iVBORw0KGgo=',
+            'data:image/png,iVBORw0KGgo=',
+            'data:image/png;base64,iVBO*w0KGgo=',
+            'data:image/png;base64,iVBORw0KGg',
+        ):
+            with self.subTest(value=value):
+                with self.assertRaises(serializers.ValidationError):
+                    decode_base64_upload(value)
+
+    def test_size_limit(self):
+        """Строка больше IMAGE_UPLOAD_MAX_SIZE отклоняется до декодирования."""
+        with override_settings(IMAGE_UPLOAD_MAX_SIZE=999):
+            with mock.patch('api.uploads.base64.b64decode') as b64decode:
+                with self.assertRaisesMessage(
+                    serializers.ValidationError, 'Размер файла'
+                ):
+                    decode_base64_upload(data_url(self.payload))
+        b64decode.assert_not_called()
+        with override_settings(IMAGE_UPLOAD_MAX_SIZE=1000):
+            content, _ = self.decode(data_url(self.payload))
+        self.assertEqual(content, self.payload)
+
+
+class MultiPartUploadLimitTest(TestCase):
+    """Ограничение размера multipart-запроса по Content-Length."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Пользователь."""
+        cls.user = MyUser.objects.create_user(
+            email='reader@example.com',
+            username='reader',
+            first_name='Имя',
+            last_name='Фамилия',
+            password='password-123',
+        )
+
+    @override_settings(
+        IMAGE_UPLOAD_MAX_SIZE=1000, DATA_UPLOAD_MAX_MEMORY_SIZE=1000
+    )
+    def test_large_request_is_rejected(self):
+        """Запрос длиннее лимита отклоняется с 413 до разбора тела."""
+        client = APIClient()
+        client.force_authenticate(self.user)
+        avatar = SimpleUploadedFile(
+            'avatar.png', os.urandom(3000), content_type='image/png'
+        )
+        with mock.patch('api.parsers.MultiPartParser.parse') as parse:
+            response = client.put(
+                '/api/users/me/avatar/', {'avatar': avatar},
+                format='multipart',
+            )
+        self.assertEqual(response.status_code, 413)
+        parse.assert_not_called()
@@ -0,0 +1,123 @@
+"""Приём изображений без лишних копий в памяти.
+
+Строка data:image/...;base64,... декодируется частями по
+BASE64_CHUNK_SIZE прямо в загружаемый файл: небольшие файлы остаются в
+памяти, файлы больше FILE_UPLOAD_MAX_MEMORY_SIZE пишутся во временный
+файл на диске, как при обычной multipart-загрузке Django. Так ни
+декодированные байты целиком, ни отдельная копия строки без заголовка
+не создаются. Пробелы и переводы строк (например, base64 с переносами
+по 76 символов) пропускаются при декодировании каждой части.
+"""
+import base64
+import binascii
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import (
+    InMemoryUploadedFile,
+    TemporaryUploadedFile,
+)
+from rest_framework import serializers
+
+from api.constants import BASE64_CHUNK_SIZE
+
+BASE64_MARKER = ';base64,'
+BASE64_WHITESPACE = ' \t\n\r\v\f'
+STRIP_WHITESPACE = str.maketrans('', '', BASE64_WHITESPACE)
+
+
+class Base64TemporaryFile(TemporaryUploadedFile):
+    """Временный файл декодированной строки base64.
+
+    Файлы multipart закрывает сам Django в конце запроса, а этот файл
+    закрывается при удалении объекта. Если хранилище уже перенесло файл,
+    close() молча пропускает отсутствующий временный файл.
+    """
+
+    def __del__(self):
+        """Закрытие и удаление временного файла."""
+        self.close()
+
+
+def get_decoded_size(value, start):
+    """Размер декодированных данных base64 начиная с позиции start.
+
+    Пробельные символы не учитываются; строка при этом не копируется.
+    """
+    length = len(value) - start - sum(
+        value.count(char, start) for char in BASE64_WHITESPACE
+    )
+    end = len(value)
+    while end > start and value[end - 1] in BASE64_WHITESPACE:
+        end -= 1
+    padding = 0
+    if length and value[end - 2:end] == '==':
+        padding = 2
+    elif length and value[end - 1:end] == '=':
+        padding = 1
+    return length // 4 * 3 - padding
+
+
+def iter_base64_chunks(value, start):
+    """Части строки base64 без пробелов длиной кратной 4.
+
+    Остаток части, не кратный 4 после удаления пробелов, переносится в
+    следующую; последний остаток возвращается как есть, и его длину
+    проверяет b64decode.
+    """
+    rest = ''
+    for offset in range(start, len(value), BASE64_CHUNK_SIZE):
+        chunk = rest + value[offset:offset + BASE64_CHUNK_SIZE].translate(
+            STRIP_WHITESPACE
+        )
+        cut = len(chunk) - len(chunk) % 4
+        rest = chunk[cut:]
+        if cut:
+            yield chunk[:cut]
+    if rest:
+        yield rest
+
+
+def check_upload_size(size):
+    """Проверка размера файла по IMAGE_UPLOAD_MAX_SIZE."""
+    if size > settings.IMAGE_UPLOAD_MAX_SIZE:
+        raise serializers.ValidationError(
+            'Размер файла превышает '
+            f'{settings.IMAGE_UPLOAD_MAX_SIZE // 1024} КБ.'
+        )
+
+
+def decode_base64_upload(value):
+    """Загружаемый файл из строки data URL с base64.
+
+    Размер проверяется до декодирования по длине строки без пробелов.
+    Расширение временного имени берётся из типа в заголовке.
+    """
+    marker = value.find(BASE64_MARKER)
+    if not value.startswith('data:') or marker == -1:
+        raise serializers.ValidationError(
+            'Ожидается строка data:<тип>;base64,<данные>.'
+        )
+    content_type = value[len('data:'):marker]
+    name = 'upload.{}'.format(content_type.rpartition('/')[2])
+    start = marker + len(BASE64_MARKER)
+    size = get_decoded_size(value, start)
+    check_upload_size(size)
+    if size > settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+        upload = Base64TemporaryFile(name, content_type, size, None)
+    else:
+        upload = InMemoryUploadedFile(
+            BytesIO(), None, name, content_type, size, None
+        )
+    try:
+        for chunk in iter_base64_chunks(value, start):
+            upload.file.write(base64.b64decode(chunk, validate=True))
+    except (binascii.Error, ValueError):
+        upload.close()
+        raise serializers.ValidationError(
+            'Некорректные данные base64.'
+        )
+    upload.file.flush()
+    upload.size = upload.file.tell()
+    upload.file.seek(0)
+    return upload
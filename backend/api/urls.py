@@ -2,13 +2,19 @@ from django.urls import include, path
 from rest_framework import routers
 
 from api.views import (
+    FavoriteBatchViewSet,
     FavoriteViewSet,
     IngredientViewSet,
     RecipeViewSet,
+    ShoppingCartBatchViewSet,
+    ShoppingCartSummaryViewSet,
     ShoppingCartViewSet,
+    ShoppingListJobViewSet,
     ShowSubscriptionsViewSet,
+    SubscriptionBatchViewSet,
     SubscriptionViewSet,
     TagViewSet,
+    TokenCacheStatsViewSet,
     UserAvatarViewSet,
 )
 
@@ -32,6 +38,31 @@ urlpatterns = [
         ShoppingCartViewSet.as_view(),
         name='download_shopping_cart',
     ),
+    path(
+        'recipes/download_shopping_cart/jobs/<str:job_id>/',
+        ShoppingListJobViewSet.as_view(),
+        name='shopping_list_job',
+    ),
+    path(
+        'recipes/shopping_cart/',
+        ShoppingCartSummaryViewSet.as_view(),
+        name='shopping_cart_summary',
+    ),
+    path(
+        'recipes/shopping_cart/batch/',
+        ShoppingCartBatchViewSet.as_view(),
+        name='shopping_cart_batch',
+    ),
+    path(
+        'recipes/favorite/batch/',
+        FavoriteBatchViewSet.as_view(),
+        name='favorite_batch',
+    ),
+    path(
+        'users/subscribe/batch/',
+        SubscriptionBatchViewSet.as_view(),
+        name='subscribe_batch',
+    ),
     path(
         'recipes/<int:recipe_id>/shopping_cart/',
         ShoppingCartViewSet.as_view(),
@@ -62,6 +93,11 @@ urlpatterns = [
         }),
         name='user_avatar',
     ),
+    path(
+        'auth/token_cache/',
+        TokenCacheStatsViewSet.as_view(),
+        name='token_cache_stats',
+    ),
     path('auth/', include('djoser.urls.authtoken')),
     path('', include('djoser.urls')),
     path('', include(router.urls)),
@@ -1,69 +1,161 @@
-from io import BytesIO
+from collections import defaultdict
+from itertools import chain
 
-import base64
-from django.core.files.base import ContentFile
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.db.models import Count
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListAPIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import (
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+)
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
+from api.authentication import token_cache
+from api.cache import get_user_version, get_version, make_validators
+from api.constants import (
+    ASYNC_QUERY_PARAM,
+    ASYNC_TRUE_VALUES,
+    JOB_RETRY_AFTER,
+)
+from api.feed import follow, get_feed_streams, unfollow
 from api.filters import IngredientFilter, RecipeFilter
-from api.pagination import CustomPagination
+from api.jobs import (
+    JOB_FAILED,
+    JOB_PENDING,
+    get_job,
+    get_job_pdf,
+    start_pdf_job,
+)
+from api.mixins import (
+    BatchRelationMixin,
+    RelationMixin,
+    CatalogMixin,
+    ConditionalGetMixin,
+    IngredientSearchMixin,
+    ResponseCacheMixin,
+    StreamingListMixin,
+)
+from api.pagination import (
+    CustomPagination,
+    FeedPagination,
+    RecipePagination,
+)
+from api.parsers import MultiPartJSONParser
 from api.permissions import IsAuthorOrAdminOrReadOnly
 from api.serializers import (
+    AvatarSerializer,
+    CompiledRecipeSerializer,
     IngredientSerializer,
     RecipeCreateSerializer,
     RecipeSerializer,
     ShoppingCartSerializer,
+    ShoppingTotalSerializer,
     ShowSubscriptionsSerializer,
     SubscriptionSerializer,
     TagSerializer,
     MyUserSerializer,
 )
-from api.constants import (
-    FONT_NAME,
-    FONT_SIZE,
-    FONT_SIZE_SMALL,
-    PAGE_INGREDIENT_X,
-    PAGE_INGREDIENT_Y,
-    PAGE_INGREDIENT_Y_STEP,
-    PAGE_MARGIN,
-    PAGE_TITLE_X,
-    PAGE_TITLE_Y,
+from api.shopping import (
+    cart_changed,
+    build_pdf,
+    get_cached_pdf,
+    iter_shopping_list,
+    stream_csv,
+    stream_txt,
 )
 from recipes.models import (
-    AmountIngredient,
     Favorite,
     Ingredient,
     Recipe,
     ShoppingCart,
+    ShoppingTotal,
     Tag,
 )
 from users.models import MyUser, Subscriptions
 
-pdfmetrics.registerFont(TTFont(FONT_NAME, 'DejaVuSans.ttf'))
+
+def pdf_response(request, etag, pdf):
+    """Ответ с PDF из кэша с учётом If-None-Match."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = (
+        'attachment; filename="shopping-list.pdf"'
+    )
+    response['ETag'] = etag
+    return response
+
+
+SHOPPING_LIST_FORMATS = {
+    'pdf': None,
+    'txt': (stream_txt, 'text/plain; charset=utf-8'),
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+}
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    ConditionalGetMixin, ResponseCacheMixin, viewsets.ModelViewSet
+):
     """ViewSet для добавления/изменения/удаления/просмотра рецептов."""
 
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = [IsAuthorOrAdminOrReadOnly]
-    pagination_class = CustomPagination
+    parser_classes = [JSONParser, MultiPartJSONParser]
+    pagination_class = RecipePagination
+    feed_pagination_class = FeedPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
     search_fields = ['name', 'author__username']
+    read_serializer_class = CompiledRecipeSerializer
+    cache_namespace = 'recipes'
+    cache_user_flags = True
+    cache_bypass_params = ('is_favorited', 'is_in_shopping_cart')
+    conditional_namespaces = ('recipes',)
+    conditional_user_flags = True
+
+    def get_queryset(self):
+        """Возвращает рецепты с подгруженными связями и флагами."""
+        user = self.request.user
+        return (
+            Recipe.objects.with_related(user)
+            .with_user_flags(user)
+        )
+
+    def get_object_validators(self, request):
+        """Валидаторы рецепта по его updated_at и версиям справочников.
+
+        Изменения других рецептов не меняют ETag этого рецепта.
+        """
+        try:
+            updated_at = Recipe.objects.filter(
+                pk=self.kwargs[self.lookup_field]
+            ).values_list('updated_at', flat=True).first()
+        except ValueError:
+            return None
+        if updated_at is None:
+            return None
+        stamps = [
+            int(updated_at.timestamp() * 1000),
+            *(
+                get_version(namespace)
+                for namespace in ('tags', 'ingredients', 'users')
+            ),
+        ]
+        if request.user.is_authenticated:
+            stamps.append(get_user_version(request.user.pk))
+        return make_validators(request, stamps, updated_at.isoformat())
 
     def get_serializer_context(self):
         """Добавляет request в контекст сериализатора."""
@@ -74,9 +166,32 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         """Возвращает класс сериализатора в зависимости от типа запроса."""
         if self.request.method == 'GET':
-            return RecipeSerializer
+            return self.read_serializer_class
         return RecipeCreateSerializer
 
+    @action(
+        detail=False, methods=['get'], permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь.
+
+        Страница выбирается по индексам ленты, а фильтры рецептов
+        подключаются к источникам, только если заданы в запросе.
+        """
+        queryset = self.get_queryset()
+        recipes = None
+        if any(
+            name in request.query_params
+            for name in self.filterset_class.base_filters
+        ):
+            recipes = self.filter_queryset(queryset)
+        paginator = self.feed_pagination_class()
+        page = paginator.paginate_streams(
+            get_feed_streams(request.user, recipes), queryset, request
+        )
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['get'])
     def get_link(self, request, pk=None):
         """Получение короткой ссылки на рецепт."""
@@ -85,7 +200,14 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response({'short-link': full_url})
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    CatalogMixin,
+    ConditionalGetMixin,
+    IngredientSearchMixin,
+    ResponseCacheMixin,
+    StreamingListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet для отображения ингредиентов."""
 
     queryset = Ingredient.objects.all()
@@ -93,95 +215,238 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = IngredientFilter
     pagination_class = None
-
-
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'ingredients'
+    catalog_namespace = 'ingredients'
+    conditional_namespaces = ('ingredients',)
+
+
+class TagViewSet(
+    CatalogMixin,
+    ConditionalGetMixin,
+    ResponseCacheMixin,
+    StreamingListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """ViewSet для отображения тегов."""
 
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [AllowAny]
     pagination_class = None
+    cache_namespace = 'tags'
+    catalog_namespace = 'tags'
+    conditional_namespaces = ('tags',)
+
+
+class ShoppingCartRelationMixin(RelationMixin):
+    """Связи пользователя с рецептами в корзине покупок."""
+
+    relation_model = ShoppingCart
+    target_model = Recipe
+    target_field = 'recipe'
+
+    def relations_changed(self, request, target_ids):
+        """Инвалидация списка покупок и пересчёт его итогов."""
+        super().relations_changed(request, target_ids)
+        cart_changed(request.user.pk, target_ids)
+
 
+class FavoriteRelationMixin(RelationMixin):
+    """Связи пользователя с рецептами в избранном."""
 
-class ShoppingCartViewSet(APIView):
+    relation_model = Favorite
+    target_model = Recipe
+    target_field = 'recipe'
+
+
+class SubscriptionRelationMixin(RelationMixin):
+    """Подписки пользователя на авторов."""
+
+    relation_model = Subscriptions
+    target_model = MyUser
+    target_field = 'author'
+
+    def get_invalid_ids(self, request, ids):
+        """Подписка на самого себя недопустима."""
+        return {request.user.pk} & set(ids)
+
+    def relations_added(self, request, target_ids):
+        """Добавление рецептов новых авторов в ленту."""
+        super().relations_added(request, target_ids)
+        follow(request.user.pk, target_ids)
+
+    def relations_removed(self, request, target_ids):
+        """Удаление рецептов авторов из ленты."""
+        super().relations_removed(request, target_ids)
+        unfollow(request.user.pk, target_ids)
+
+
+class ShoppingCartViewSet(ShoppingCartRelationMixin, APIView):
     """Добавление и удаление рецепта из корзины покупок."""
 
     permission_classes = [IsAuthenticated]
 
     def post(self, request, recipe_id):
         """Добавление рецепта в корзину покупок."""
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        shopping_cart, created = ShoppingCart.objects.get_or_create(
-            user=request.user, recipe=recipe
-        )
-        if not created:
+        if not self.add_relation(request, recipe_id):
+            get_object_or_404(Recipe, id=recipe_id)
             return Response(
                 {'errors': 'Рецепт уже в корзине'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        shopping_cart = ShoppingCart(
+            user=request.user, recipe=Recipe.objects.get(id=recipe_id)
+        )
         serializer = ShoppingCartSerializer(shopping_cart)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, recipe_id):
         """Удаление рецепта из корзины покупок."""
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        shopping_cart = get_object_or_404(
-            ShoppingCart, user=request.user, recipe=recipe
-        )
-        shopping_cart.delete()
+        if not self.remove_relation(request, recipe_id):
+            raise Http404
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    def get(self, request):
-        """Скачивание списка покупок в формате PDF."""
-        recipes = Recipe.objects.filter(cart__user=request.user)
-        ingredients = (
-            AmountIngredient.objects.filter(recipe__in=recipes)
-            .values('ingredient__name', 'ingredient__measurement_unit')
-            .annotate(total_amount=Sum('amount'))
-            .order_by('ingredient__name')
-        )
+    def perform_content_negotiation(self, request, force=False):
+        """Согласование без учёта ?format=, он задаёт формат файла."""
+        return super().perform_content_negotiation(request, force=True)
 
-        if not ingredients:
+    def get(self, request):
+        """Скачивание списка покупок в формате pdf, txt или csv."""
+        export_format = request.query_params.get('format', 'pdf')
+        if export_format not in SHOPPING_LIST_FORMATS:
             return Response(
-                {'errors': 'Список покупок пуст'},
+                {'errors': 'Неподдерживаемый формат списка покупок'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if export_format == 'pdf':
+            return self.get_pdf(request)
+        ingredients = iter_shopping_list(request.user)
+        first = next(ingredients, None)
+        if first is None:
+            return self.empty_response()
+        stream, content_type = SHOPPING_LIST_FORMATS[export_format]
+        response = StreamingHttpResponse(
+            stream(chain((first,), ingredients)), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="shopping-list.{export_format}"'
+        )
+        return response
 
-        buffer = BytesIO()
-        p = canvas.Canvas(buffer, pagesize=A4)
+    def get_pdf(self, request):
+        """Список покупок в PDF.
+
+        Файл кэшируется по версии корзины пользователя и повторно
+        отдаётся без пересчёта, с ETag по содержимому. В асинхронном
+        режиме ставится фоновая задача и возвращается 202.
+        """
+        if self.is_async(request):
+            return self.start_job(request)
+        entry = get_cached_pdf(request.user)
+        if entry is not None:
+            return pdf_response(request, *entry)
+        response = HttpResponse(content_type='application/pdf')
+        etag = build_pdf(request.user, response)
+        if etag is None:
+            return self.empty_response()
+        response['Content-Disposition'] = (
+            'attachment; filename="shopping-list.pdf"'
+        )
+        response['ETag'] = etag
+        return response
 
-        p.setFont(FONT_NAME, FONT_SIZE)
+    @staticmethod
+    def is_async(request):
+        """Режим отрисовки из ?async= или настройки по умолчанию."""
+        value = request.query_params.get(ASYNC_QUERY_PARAM)
+        if value is None:
+            return settings.SHOPPING_LIST_ASYNC
+        return value.lower() in ASYNC_TRUE_VALUES
+
+    def start_job(self, request):
+        """Постановка фоновой задачи отрисовки PDF."""
+        started = start_pdf_job(request.user)
+        if started is None:
+            return self.empty_response()
+        job_id, job = started
+        url = request.build_absolute_uri(
+            reverse('api:shopping_list_job', kwargs={'job_id': job_id})
+        )
+        return Response(
+            {'id': job_id, 'status': job['status'], 'url': url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': url},
+        )
 
-        p.drawString(PAGE_TITLE_X, PAGE_TITLE_Y, 'Список покупок')
-        p.setFont(FONT_NAME, FONT_SIZE_SMALL)
+    @staticmethod
+    def empty_response():
+        """Ответ для пустой корзины."""
+        return Response(
+            {'errors': 'Список покупок пуст'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-        y = PAGE_INGREDIENT_Y
-        for ingredient in ingredients:
-            name = ingredient['ingredient__name']
-            unit = ingredient['ingredient__measurement_unit']
-            amount = ingredient['total_amount']
-            text = f'{name} ({unit}) - {amount}'
-            p.drawString(PAGE_INGREDIENT_X, y, text)
-            y -= PAGE_INGREDIENT_Y_STEP
-            if y < PAGE_MARGIN:
-                p.showPage()
-                y = PAGE_INGREDIENT_Y
-                p.setFont(FONT_NAME, FONT_SIZE_SMALL)
 
-        p.save()
+class ShoppingCartSummaryViewSet(APIView):
+    """Сводка по корзине покупок из таблицы итогов."""
 
-        pdf = buffer.getvalue()
-        buffer.close()
+    permission_classes = [IsAuthenticated]
 
-        response = HttpResponse(pdf, content_type='application/pdf')
-        response['Content-Disposition'] = (
-            'attachment; filename="shopping-list.pdf"'
+    def get(self, request):
+        """Число рецептов, позиций и итоговые количества."""
+        totals = (
+            ShoppingTotal.objects.filter(user=request.user)
+            .select_related('ingredient')
+            .order_by('ingredient__name')
         )
-        return response
+        ingredients = ShoppingTotalSerializer(totals, many=True).data
+        return Response({
+            'recipes_count': ShoppingCart.objects.filter(
+                user=request.user
+            ).count(),
+            'items_count': len(ingredients),
+            'ingredients': ingredients,
+        })
+
+
+class ShoppingListJobViewSet(APIView):
+    """Статус фоновой задачи и готовый PDF списка покупок."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        """PDF готовой задачи или её текущее состояние."""
+        job = get_job(job_id)
+        if job is None or job['user_id'] != request.user.pk:
+            return Response(
+                {'errors': 'Задача не найдена'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        if job['status'] == JOB_PENDING:
+            return Response(
+                {'id': job_id, 'status': job['status']},
+                status=status.HTTP_202_ACCEPTED,
+                headers={'Retry-After': str(JOB_RETRY_AFTER)},
+            )
+        if job['status'] == JOB_FAILED:
+            return Response(
+                {
+                    'id': job_id,
+                    'status': job['status'],
+                    'errors': 'Не удалось сформировать список покупок',
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        entry = get_job_pdf(job)
+        if entry is None:
+            return Response(
+                {'errors': 'Задача не найдена'},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        return pdf_response(request, *entry)
 
 
-class FavoriteViewSet(APIView):
+class FavoriteViewSet(FavoriteRelationMixin, APIView):
     """Добавление и удаление рецепта из избранного."""
 
     permission_classes = [IsAuthenticated]
@@ -189,33 +454,52 @@ class FavoriteViewSet(APIView):
 
     def post(self, request, recipe_id):
         """Добавление рецепта в избранное."""
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        favorite, created = Favorite.objects.get_or_create(
-            user=request.user, recipe=recipe
-        )
-        if not created:
+        if not self.add_relation(request, recipe_id):
+            get_object_or_404(Recipe, id=recipe_id)
             return Response(
                 {'errors': 'Рецепт уже в избранном'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        recipe = Recipe.objects.get(id=recipe_id)
         serializer = RecipeSerializer(recipe, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, recipe_id):
         """Удаление рецепта из избранного."""
-        recipe = get_object_or_404(Recipe, id=recipe_id)
-        try:
-            favorite = Favorite.objects.get(user=request.user, recipe=recipe)
-            favorite.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except Favorite.DoesNotExist:
+        if not self.remove_relation(request, recipe_id):
+            get_object_or_404(Recipe, id=recipe_id)
             return Response(
                 {'errors': 'Рецепт не был в избранном'},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class FavoriteBatchViewSet(
+    BatchRelationMixin, FavoriteRelationMixin, APIView
+):
+    """Пакетное добавление и удаление рецептов в избранном."""
+
+    permission_classes = [IsAuthenticated]
+
 
+class ShoppingCartBatchViewSet(
+    BatchRelationMixin, ShoppingCartRelationMixin, APIView
+):
+    """Пакетное добавление и удаление рецептов в корзине покупок."""
+
+    permission_classes = [IsAuthenticated]
 
-class SubscriptionViewSet(APIView):
+
+class SubscriptionBatchViewSet(
+    BatchRelationMixin, SubscriptionRelationMixin, APIView
+):
+    """Пакетная подписка на авторов и отписка от них."""
+
+    permission_classes = [IsAuthenticated]
+
+
+class SubscriptionViewSet(SubscriptionRelationMixin, APIView):
     """Добавление и удаление подписки на пользователя."""
 
     permission_classes = [IsAuthenticated]
@@ -223,20 +507,21 @@ class SubscriptionViewSet(APIView):
 
     def post(self, request, user_id):
         """Подписка на пользователя."""
-        author = get_object_or_404(MyUser, id=user_id)
-        subscription, created = Subscriptions.objects.get_or_create(
-            user=request.user, author=author
-        )
+        if self.get_invalid_ids(request, [user_id]):
+            return Response(
+                {'errors': 'Нельзя подписаться на самого себя'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not self.add_relation(request, user_id):
+            get_object_or_404(MyUser, id=user_id)
+        subscription = Subscriptions(user=request.user, author_id=user_id)
         serializer = SubscriptionSerializer(subscription)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete(self, request, user_id):
         """Отписка от пользователя."""
-        author = get_object_or_404(MyUser, id=user_id)
-        subscription = get_object_or_404(
-            Subscriptions, user=request.user, author=author
-        )
-        subscription.delete()
+        if not self.remove_relation(request, user_id):
+            raise Http404
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -249,14 +534,53 @@ class ShowSubscriptionsViewSet(ListAPIView):
 
     def get_queryset(self):
         """Получение списка подписок текущего пользователя."""
-        return self.request.user.subscriptions.select_related("author")
+        return (
+            self.request.user.subscriptions.select_related('author')
+            .annotate(recipes_count=Count('author__recipes'))
+            .order_by('-subscribed_at', '-id')
+        )
+
+    def get_recipes_limit(self):
+        """recipes_limit из запроса или None, если он не задан.
+
+        0 означает подписки без рецептов; отрицательное или нецелое
+        значение — ошибка 400.
+        """
+        value = self.request.query_params.get('recipes_limit')
+        if not value:
+            return None
+        try:
+            recipes_limit = int(value)
+        except ValueError:
+            recipes_limit = -1
+        if recipes_limit < 0:
+            raise ValidationError(
+                {'recipes_limit': 'Укажите целое число не меньше 0'}
+            )
+        return recipes_limit
+
+    def paginate_queryset(self, queryset):
+        """Страница подписок с последними рецептами авторов.
+
+        Рецепты всех авторов страницы загружаются одним запросом.
+        """
+        page = super().paginate_queryset(queryset)
+        if page is None:
+            return None
+        recipes = defaultdict(list)
+        for recipe in Recipe.objects.latest_by_author(
+            [subscription.author_id for subscription in page],
+            self.get_recipes_limit(),
+        ):
+            recipes[recipe.author_id].append(recipe)
+        for subscription in page:
+            subscription.latest_recipes = recipes[subscription.author_id]
+        return page
 
     def get_serializer_context(self):
         """Добавление recipes_limit в контекст сериализатора."""
         context = super().get_serializer_context()
-        context['recipes_limit'] = self.request.query_params.get(
-            'recipes_limit'
-        )
+        context['recipes_limit'] = self.get_recipes_limit()
         return context
 
 
@@ -265,6 +589,7 @@ class UserAvatarViewSet(viewsets.ModelViewSet):
 
     permission_classes = [IsAuthenticated]
     serializer_class = MyUserSerializer
+    parser_classes = [JSONParser, MultiPartJSONParser]
     http_method_names = ['post', 'patch', 'put', 'delete']
 
     def get_object(self):
@@ -291,7 +616,7 @@ class UserAvatarViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     def _handle_avatar(self, request):
-        """Обработка загрузки аватара."""
+        """Обработка загрузки аватара из base64 или multipart."""
         user = self.get_object()
 
         if "avatar" not in request.data:
@@ -300,29 +625,24 @@ class UserAvatarViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        try:
-            avatar_data = request.data['avatar']
-            if isinstance(avatar_data, str) and avatar_data.startswith(
-                'data:image'
-            ):
-                format, imgstr = avatar_data.split(';base64,')
-                ext = format.split('/')[-1]
-                data = ContentFile(
-                    base64.b64decode(imgstr),
-                    name=f'avatar.{ext}',
-                )
-                user.avatar = data
-                user.save()
-
-                serializer = self.get_serializer(user)
-                return Response(serializer.data)
-            else:
-                return Response(
-                    {'error': 'Неверный формат данных аватара'},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-        except Exception as e:
+        serializer = AvatarSerializer(user, data=request.data)
+        if not serializer.is_valid():
             return Response(
-                {'error': f'Ошибка при сохранении аватара: {str(e)}'},
+                {
+                    'error': 'Неверный формат данных аватара',
+                    **serializer.errors,
+                },
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        serializer.save()
+        return Response(self.get_serializer(user).data)
+
+
+class TokenCacheStatsViewSet(APIView):
+    """Счётчики кэша аутентификации по токену текущего воркера."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """Попадания, промахи и размер кэша токенов."""
+        return Response(token_cache.stats())
@@ -71,6 +71,81 @@ DATABASES = {
     }
 }
 
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+}
+
+# Кэш по умолчанию общий для всех процессов контейнера: версии кэша
+# ответов, задачи PDF и отметки справочников должны быть видны всем
+# воркерам gunicorn и командам manage.py. locmem подходит только для
+# одного процесса.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default='file')
+
+CACHE_LOCATIONS = {
+    'locmem': 'foodgram',
+    'file': os.path.join(BASE_DIR, 'cache'),
+    'db': 'api_cache',
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', default=CACHE_LOCATIONS[CACHE_BACKEND]
+        ),
+    }
+}
+
+RESPONSE_CACHE_ALIAS = 'default'
+
+TEST_RUNNER = 'foodgram.test_runner.TestRunner'
+
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=300))
+
+CATALOG_BLOB_TTL = int(os.getenv('CATALOG_BLOB_TTL', default=60))
+
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.getenv('SHOPPING_LIST_CACHE_TIMEOUT', default=24 * 60 * 60)
+)
+
+SHOPPING_LIST_FONT_PATH = os.getenv(
+    'SHOPPING_LIST_FONT_PATH', default='DejaVuSans.ttf'
+)
+
+SHOPPING_LIST_ASYNC = os.getenv(
+    'SHOPPING_LIST_ASYNC', default='False'
+).lower() in ('true', '1', 'yes')
+
+SHOPPING_LIST_WORKERS = int(os.getenv('SHOPPING_LIST_WORKERS', default=2))
+
+SHOPPING_LIST_JOB_TIMEOUT = int(
+    os.getenv('SHOPPING_LIST_JOB_TIMEOUT', default=10 * 60)
+)
+
+FEED_FAN_OUT_LIMIT = int(os.getenv('FEED_FAN_OUT_LIMIT', default=1000))
+
+FEED_FAN_OUT_BATCH = int(os.getenv('FEED_FAN_OUT_BATCH', default=500))
+
+INGREDIENT_SEARCH_BACKEND = os.getenv(
+    'INGREDIENT_SEARCH_BACKEND', default='memory'
+)
+
+INGREDIENT_SEARCH_LIMIT = int(os.getenv('INGREDIENT_SEARCH_LIMIT', default=0))
+
+INGREDIENT_INDEX_TTL = int(os.getenv('INGREDIENT_INDEX_TTL', default=60))
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', default=1024))
+
+TOKEN_CACHE_TIMEOUT = int(os.getenv('TOKEN_CACHE_TIMEOUT', default=300))
+
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS', default='')
+
+IMAGE_UPLOAD_MAX_SIZE = int(
+    os.getenv('IMAGE_UPLOAD_MAX_SIZE', default=5 * 1024 * 1024)
+)
+
 AUTH_USER_MODEL = 'users.MyUser'
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -93,11 +168,15 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        "rest_framework.authentication.TokenAuthentication",
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 DJOSER = {
@@ -134,4 +213,10 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+DEFAULT_FILE_STORAGE = os.getenv(
+    'DEFAULT_FILE_STORAGE', default='api.storage.ContentAddressedStorage'
+)
+
+MEDIA_SWEEP_MIN_AGE = int(os.getenv('MEDIA_SWEEP_MIN_AGE', default=60 * 60))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,26 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Запуск тестов с кэшем в памяти процесса.
+
+    Общий кэш (file, db) сохраняется между запусками, и версии и ответы
+    прошлого запуска попали бы в тесты с новой базой.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        """Подмена кэша на locmem на время тестов."""
+        super().setup_test_environment(**kwargs)
+        self.cache_override = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'foodgram-tests',
+            },
+        })
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        """Возврат настроек кэша."""
+        self.cache_override.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,32 @@
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', default=1))
+preload_app = os.getenv(
+    'GUNICORN_PRELOAD', default='False'
+).lower() in ('true', '1', 'yes')
+
+
+def on_starting(server):
+    """Отказ от запуска нескольких воркеров с кэшем в памяти процесса.
+
+    С CACHE_BACKEND=locmem каждый воркер видит только свои версии кэша
+    ответов и задачи PDF, и изменения из других воркеров теряются.
+    """
+    if server.cfg.workers > 1 and os.getenv('CACHE_BACKEND') == 'locmem':
+        raise RuntimeError(
+            'CACHE_BACKEND=locmem не поддерживает несколько воркеров '
+            'gunicorn: укажите file или db.'
+        )
+
+
+def when_ready(server):
+    """Загрузка ReportLab в мастер-процессе до запуска воркеров.
+
+    При preload_app приложение уже загружено, и воркеры после fork
+    разделяют страницы памяти с модулями ReportLab и шрифтом.
+    """
+    if server.cfg.preload_app:
+        from api.shopping import load_pdf_backend
+
+        load_pdf_backend()
@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.cache import bump_version
+from api.signals import CACHE_DEPENDENCIES
+
+READ_CHUNK_SIZE = 64 * 1024
+DEFAULT_BATCH_SIZE = 5000
+
+
+def iter_json_array(stream, chunk_size=READ_CHUNK_SIZE):
+    """Потоковый разбор JSON-массива объектов из файла.
+
+    Файл читается кусками по chunk_size символов, в памяти держится
+    только текущий кусок и незавершённый элемент.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+    need_more = True
+    while True:
+        if need_more and not eof:
+            chunk = stream.read(chunk_size)
+            eof = not chunk
+            buffer += chunk
+        need_more = False
+        if not started:
+            buffer = buffer.lstrip()
+            if not buffer:
+                if eof:
+                    return
+                need_more = True
+                continue
+            if buffer[0] != '[':
+                raise ValueError('Ожидается JSON-массив')
+            buffer = buffer[1:]
+            started = True
+        buffer = buffer.lstrip(', \t\r\n')
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            need_more = True
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def batched(iterable, size):
+    """Разбиение итератора на списки длиной size."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    """Загрузка справочника из JSON-файла большими пачками."""
+
+    help = (
+        'Загружает JSON-массив объектов в модель справочника. '
+        'Повторная загрузка не создаёт дубликатов.'
+    )
+    model_label = None
+    default_path = None
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        if self.model_label is None:
+            parser.add_argument('model', help='Модель, например recipes.Tag')
+        parser.add_argument(
+            'path', nargs='?' if self.default_path else None,
+            default=self.default_path, help='Путь к JSON-файлу',
+        )
+        parser.add_argument(
+            '--fields', nargs='+',
+            help='Загружаемые поля (по умолчанию ключи первого объекта)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Не использовать COPY даже на PostgreSQL',
+        )
+
+    def handle(self, *args, **options):
+        """Загрузка файла и вывод статистики."""
+        label = self.model_label or options['model']
+        try:
+            model = apps.get_model(label)
+        except (LookupError, ValueError) as error:
+            raise CommandError(error)
+        use_copy = (
+            connection.vendor == 'postgresql' and not options['no_copy']
+        )
+        started = time.perf_counter()
+        processed = inserted = 0
+        before = None if use_copy else model.objects.count()
+        with open(options['path'], encoding='utf-8') as stream:
+            rows = iter_json_array(stream)
+            fields = options['fields']
+            for batch in batched(rows, options['batch_size']):
+                if fields is None:
+                    fields = list(batch[0])
+                    self.check_fields(model, fields)
+                if use_copy:
+                    inserted += self.copy_batch(model, fields, batch)
+                else:
+                    self.bulk_create_batch(model, fields, batch)
+                processed += len(batch)
+        if before is not None:
+            inserted = model.objects.count() - before
+        elapsed = time.perf_counter() - started
+        bump_version(*CACHE_DEPENDENCIES.get(model, ()))
+        self.stdout.write(self.style.SUCCESS(
+            f'{model._meta.label}: обработано {processed}, '
+            f'добавлено {inserted} за {elapsed:.2f} с '
+            f'({processed / elapsed if elapsed else 0:.0f} строк/с, '
+            f'{"COPY" if use_copy else "bulk_create"})'
+        ))
+
+    @staticmethod
+    def check_fields(model, fields):
+        """Проверка, что все поля есть в модели."""
+        names = {field.name for field in model._meta.concrete_fields}
+        unknown = set(fields) - names
+        if unknown:
+            raise CommandError(
+                f'Неизвестные поля {model._meta.label}: '
+                f'{", ".join(sorted(unknown))}'
+            )
+
+    @staticmethod
+    def bulk_create_batch(model, fields, batch):
+        """Вставка пачки через bulk_create с пропуском конфликтов."""
+        model.objects.bulk_create(
+            [
+                model(**{field: row.get(field) for field in fields})
+                for row in batch
+            ],
+            ignore_conflicts=True,
+        )
+
+    @staticmethod
+    def copy_batch(model, fields, batch):
+        """Вставка пачки через COPY во временную таблицу.
+
+        Из временной таблицы строки переносятся INSERT ... ON CONFLICT
+        DO NOTHING, поэтому уникальные ограничения соблюдаются.
+        """
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(field).column)
+            for field in fields
+        )
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow([
+                '\\N' if row.get(field) is None else row[field]
+                for field in fields
+            ])
+        buffer.seek(0)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE catalog_load ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table} WITH NO DATA'
+            )
+            cursor.copy_expert(
+                f'COPY catalog_load ({columns}) FROM STDIN '
+                f"WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT {columns} FROM catalog_load '
+                f'ON CONFLICT DO NOTHING'
+            )
+            return cursor.rowcount
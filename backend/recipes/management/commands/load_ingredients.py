@@ -0,0 +1,13 @@
+from django.conf import settings
+
+from recipes.management.commands.load_catalog import (
+    Command as LoadCatalogCommand,
+)
+
+
+class Command(LoadCatalogCommand):
+    """Загрузка ингредиентов из data/ingredients.json."""
+
+    help = 'Загружает ингредиенты из JSON-файла (по умолчанию data/).'
+    model_label = 'recipes.Ingredient'
+    default_path = str(settings.BASE_DIR.parent / 'data' / 'ingredients.json')
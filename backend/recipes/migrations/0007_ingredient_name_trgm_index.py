@@ -0,0 +1,62 @@
+from django.db import DatabaseError, migrations, transaction
+
+INDEX_NAME = 'ingredient_name_trgm_idx'
+
+
+def create_trgm_extension(connection):
+    """Установка pg_trgm; False, если её нет или не хватает прав.
+
+    CREATE EXTENSION обычно требует прав суперпользователя или владельца
+    базы, поэтому ошибка прав не прерывает миграцию: команда выполняется
+    в точке сохранения, которая откатывается при ошибке.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is not None:
+            return True
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return False
+        try:
+            with transaction.atomic(using=connection.alias):
+                cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        except DatabaseError:
+            return False
+    return True
+
+
+def create_trgm_index(apps, schema_editor):
+    """Триграммный GIN-индекс для поиска ингредиентов на PostgreSQL.
+
+    Если расширение pg_trgm недоступно или его нельзя установить с
+    правами пользователя базы, индекс не создаётся и поиск работает без
+    него (установка расширения описана в README).
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    if not create_trgm_extension(schema_editor.connection):
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON recipes_ingredient '
+        'USING gin (UPPER(name::text) gin_trgm_ops)'
+    )
+
+
+def drop_trgm_index(apps, schema_editor):
+    """Удаление триграммного индекса."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trgm_index, drop_trgm_index),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2.13 on 2026-10-17 01:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_shopping_totals(apps, schema_editor):
+    """Заполнение итогов по текущим корзинам."""
+    AmountIngredient = apps.get_model('recipes', 'AmountIngredient')
+    ShoppingTotal = apps.get_model('recipes', 'ShoppingTotal')
+    totals = (
+        AmountIngredient.objects.filter(recipe__cart__isnull=False)
+        .values('recipe__cart__user_id', 'ingredient_id')
+        .annotate(total=models.Sum('amount'))
+        .order_by()
+    )
+    ShoppingTotal.objects.bulk_create(
+        (
+            ShoppingTotal(
+                user_id=row['recipe__cart__user_id'],
+                ingredient_id=row['ingredient_id'],
+                total=row['total'],
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0007_ingredient_name_trgm_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_totals', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shopping_totals', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Итог списка покупок',
+                'verbose_name_plural': 'Итоги списков покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingtotal',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_shopping_total'),
+        ),
+        migrations.RunPython(fill_shopping_totals, migrations.RunPython.noop),
+    ]
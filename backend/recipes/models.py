@@ -4,6 +4,8 @@ from django.core.validators import (
     MinValueValidator,
 )
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Prefetch, Window
+from django.db.models.functions import RowNumber
 
 from api.constants import (
     DEFAULT_VALUE,
@@ -13,6 +15,7 @@ from api.constants import (
     VALIDATOR_MIN_VALUE,
     COLOR_LENGTH,
 )
+from users.models import Subscriptions
 
 User = get_user_model()
 
@@ -75,6 +78,84 @@ class Ingredient(models.Model):
         return f"{self.name}, {self.measurement_unit}"
 
 
+class RecipeQuerySet(models.QuerySet):
+    """QuerySet рецептов с оптимизированным путём чтения."""
+
+    def with_related(self, user=None):
+        """Подгрузка тегов, ингредиентов и автора.
+
+        Связи загружаются фиксированным числом запросов. Для
+        авторизованного пользователя автор загружается отдельным запросом
+        с аннотацией is_subscribed.
+        """
+        queryset = self.prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe',
+                queryset=AmountIngredient.objects.select_related(
+                    'ingredient'
+                ).order_by('id'),
+            ),
+        )
+        if user is None or not user.is_authenticated:
+            return queryset.select_related('author')
+        return queryset.prefetch_related(
+            Prefetch(
+                'author',
+                queryset=User.objects.annotate(
+                    is_subscribed=Exists(
+                        Subscriptions.objects.filter(
+                            user=user, author=OuterRef('pk')
+                        )
+                    )
+                ),
+            )
+        )
+
+    def latest_by_author(self, author_ids, limit=None):
+        """Последние рецепты каждого автора одним запросом.
+
+        Номер рецепта внутри автора считается через ROW_NUMBER() OVER
+        (PARTITION BY author_id), а отбор первых limit выполняется во
+        внешнем SELECT, так как Django не фильтрует по оконным функциям.
+        Загружаются только поля краткого представления рецепта; limit=0
+        означает «без рецептов», None — все рецепты.
+        """
+        queryset = self.filter(author_id__in=author_ids).only(
+            'id', 'name', 'image', 'cooking_time', 'author_id'
+        )
+        if limit is None:
+            return queryset.order_by('-pub_date', '-id')
+        if not limit:
+            return queryset.none()
+        queryset = queryset.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('author_id')],
+                order_by=[F('pub_date').desc(), F('id').desc()],
+            )
+        ).order_by()
+        sql, params = queryset.query.sql_with_params()
+        return self.raw(
+            f'SELECT * FROM ({sql}) ranked WHERE ranked.row_number <= %s '
+            'ORDER BY ranked.author_id, ranked.row_number',
+            (*params, limit),
+        )
+
+    def with_user_flags(self, user):
+        """Аннотация флагов is_favorited и is_in_shopping_cart."""
+        if user is None or not user.is_authenticated:
+            return self
+        return self.annotate(
+            is_favorited=Exists(
+                Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+            is_in_shopping_cart=Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ),
+        )
+
+
 class Recipe(models.Model):
     """Модель для рецептов."""
 
@@ -121,6 +202,9 @@ class Recipe(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True, editable=False, verbose_name='Дата публикации'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True, verbose_name='Дата изменения'
+    )
     image = models.ImageField(
         upload_to='recipes/images',
         null=True,
@@ -128,10 +212,22 @@ class Recipe(models.Model):
         verbose_name='Изображение',
     )
 
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='recipe_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='recipe_author_pub_date_idx',
+            ),
+        ]
 
     def __str__(self):
         """Строковое представление рецепта."""
@@ -248,3 +344,88 @@ class ShoppingCart(models.Model):
     def __str__(self):
         """Строковое представление корзины."""
         return f'Пользователь: {self.user} Рецепт: {self.recipe}'
+
+
+class ShoppingTotal(models.Model):
+    """Итоговое количество ингредиента в корзине пользователя.
+
+    Таблица поддерживается сигналами и api.shopping и повторяет
+    SUM(amount) по рецептам корзины для каждой пары пользователь —
+    ингредиент.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='shopping_totals',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='shopping_totals',
+        verbose_name='Ингредиент',
+    )
+    total = models.PositiveIntegerField(verbose_name='Количество')
+
+    class Meta:
+        verbose_name = 'Итог списка покупок'
+        verbose_name_plural = 'Итоги списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'ingredient'],
+                name='unique_shopping_total',
+            )
+        ]
+
+    def __str__(self):
+        """Строковое представление итога."""
+        return f'{self.user}: {self.total} {self.ingredient}'
+
+
+class FeedEntry(models.Model):
+    """Запись ленты рецептов авторов, на которых подписан пользователь."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пользователь',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор рецепта',
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry',
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-recipe'],
+                name='feed_user_pub_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='feed_user_author_idx',
+            ),
+        ]
+
+    def __str__(self):
+        """Строковое представление записи ленты."""
+        return f'{self.user}: {self.recipe}'
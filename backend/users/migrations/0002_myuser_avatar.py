@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-17 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='myuser',
+            name='avatar',
+            field=models.ImageField(blank=True, default=None, null=True, upload_to='avatars/', verbose_name='Аватар'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-17 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_myuser_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='myuser',
+            name='feed_on_read',
+            field=models.BooleanField(default=False, help_text='Рецепты автора с большим числом подписчиков не рассылаются в ленты, а добавляются при чтении ленты', verbose_name='Лента подписчиков по запросу'),
+        ),
+    ]
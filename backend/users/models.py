@@ -41,6 +41,14 @@ class MyUser(AbstractUser):
         verbose_name='Аватар',
         default=None,
     )
+    feed_on_read = models.BooleanField(
+        default=False,
+        verbose_name='Лента подписчиков по запросу',
+        help_text=(
+            'Рецепты автора с большим числом подписчиков не рассылаются '
+            'в ленты, а добавляются при чтении ленты'
+        ),
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']